@@ -3,12 +3,15 @@ from __future__ import annotations
 
 import argparse
 import csv
+import heapq
 import json
+import operator
 import re
 import sys
 from collections import Counter, defaultdict
 from datetime import datetime
-from itertools import combinations
+from functools import lru_cache
+from itertools import count
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
@@ -16,19 +19,25 @@ try:
     import numpy as np
 except Exception:  # pragma: no cover - optional dependency
     np = None
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
-from moltbook_analysis.analyze.language_ontology import language_signals  # noqa: E402
+from moltbook_analysis.analyze.language_ontology import language_signals, normalize_text  # noqa: E402
 from moltbook_analysis.analyze.incidence import human_incidence_score  # noqa: E402
 from moltbook_analysis.analyze.interference import interference_score as interference_score_v2  # noqa: E402
 
-TOKEN_RE = re.compile(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ0-9_#@']{2,}")
+TOKEN_CHARS = "A-Za-zÁÉÍÓÚÜÑáéíóúüñ0-9_#@'"
 URL_RE = re.compile(r"https?://\S+|www\.\S+")
 CODE_BLOCK_RE = re.compile(r"```.*?```", re.DOTALL)
 WHITESPACE_RE = re.compile(r"\s+")
+# URL removal and whitespace collapsing in one pass: any run of spaces/URLs becomes a single space.
+CLEAN_RE = re.compile(r"(?:\s+|https?://\S+|www\.\S+)+")
 
 STOPWORDS = {
     "the", "and", "for", "that", "this", "with", "from", "your", "you", "are", "was", "were",
@@ -47,6 +56,19 @@ CONCEPTS = {
     "ontology", "ontologia", "ethics", "etica", "pipeline", "automation",
 }
 
+# Concepts are matched as whole tokens (runs of TOKEN_CHARS); the >=3 chars / non-stopword filter of the
+# token pipeline is applied up front (so e.g. "ai" is never counted, as before).
+CONCEPTS_RE = re.compile(
+    rf"(?<![{TOKEN_CHARS}])("
+    + "|".join(sorted((c for c in CONCEPTS if len(c) >= 3 and c not in STOPWORDS), key=len, reverse=True))
+    + rf")(?![{TOKEN_CHARS}])",
+    re.IGNORECASE | re.ASCII,
+)
+# Concept ids follow sorted name order, so id order == name order. A co-occurrence pair (a, b)
+# with a < b is counted under the int key (a << 8) | b instead of a tuple of names.
+CONCEPT_NAMES = sorted(CONCEPTS)
+CONCEPT_ID = {name: i for i, name in enumerate(CONCEPT_NAMES)}
+
 FEATURES_SUBMOLT = [
     "act_request",
     "act_offer",
@@ -73,64 +95,51 @@ FEATURES_SUBMOLT = [
     "epistemic_certainty",
     "epistemic_evidence",
 ]
-
-INJECTION_PATTERNS = [
-    r"ignore (all|previous|earlier) (instructions|prompts)",
-    r"system prompt",
-    r"developer message",
-    r"you are (an|a) (assistant|model|ai)",
-    r"act as",
-    r"do anything now",
-    r"jailbreak",
-    r"### instruction",
-    r"begin (system|developer|assistant)",
-    r"end (system|developer|assistant)",
-]
-
-LLM_DISCLAIMERS = [
-    r"as an ai",
-    r"as a language model",
-    r"i (cannot|can't) (provide|comply|access)",
-    r"i don't have (access|ability)",
-]
-
-CODE_FENCE_RE = re.compile(r"```", re.MULTILINE)
-URL_MATCH_RE = re.compile(r"https?://\\S+|www\\.\\S+")
-EMOJI_RE = re.compile(r"[\\U0001F300-\\U0001FAFF]")
+FEATURES_SUBMOLT_ID = {name: i for i, name in enumerate(FEATURES_SUBMOLT)}
+FEATURES_SUBMOLT_SET = frozenset(FEATURES_SUBMOLT)
 
 
 def clean_text(text: str) -> str:
-    text = CODE_BLOCK_RE.sub(" ", text)
-    text = URL_RE.sub(" ", text)
-    text = WHITESPACE_RE.sub(" ", text).strip()
-    return text
-
+    if "```" in text:
+        text = CODE_BLOCK_RE.sub(" ", text)
+    # Fast path: no URL and no whitespace besides single ASCII spaces (isprintable() is False for
+    # tabs, newlines and Unicode spaces), so CLEAN_RE would not change anything.
+    if "http" not in text and "www." not in text and "  " not in text and text.isprintable():
+        return text.strip()
+    return CLEAN_RE.sub(" ", text).strip()
 
-def tokenize(text: str) -> List[str]:
-    return [t.lower() for t in TOKEN_RE.findall(text)]
 
-
-def _count_pattern_hits(text: str, patterns: List[str]) -> int:
-    return sum(1 for p in patterns if re.search(p, text, flags=re.IGNORECASE))
+def interference_score(text: str, cleaned: str | None = None) -> Dict[str, float]:
+    # Delegate to the shared analyzer so derive_signals.py and aggregate_objectives.py stay aligned.
+    return interference_score_v2(text, cleaned=cleaned)
 
 
-def interference_score(text: str) -> Dict[str, float]:
-    # Delegate to the shared analyzer so derive_signals.py and aggregate_objectives.py stay aligned.
-    return interference_score_v2(text)
+def _loads_line(line: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass  # retry with json; if it fails too, iter_jsonl skips the line
+    return json.loads(line)
 
 
 def iter_jsonl(path: Path) -> Iterable[dict]:
     if not path.exists():
         return []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except json.JSONDecodeError:
-                continue
+    # Binary reads in ~1 MiB batches of lines; both decoders take UTF-8 bytes directly.
+    with path.open("rb") as f:
+        while True:
+            lines = f.readlines(1 << 20)
+            if not lines:
+                break
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _loads_line(line)
+                except ValueError:
+                    continue
 
 
 def safe_submolt_name(obj) -> str | None:
@@ -141,13 +150,14 @@ def safe_submolt_name(obj) -> str | None:
     return None
 
 
+@lru_cache(maxsize=8192)
 def parse_dt(value: str | None) -> datetime | None:
     if not value:
         return None
-    raw = value.replace("Z", "+00:00")
+    # Python 3.11+ fromisoformat accepts a trailing "Z" directly.
     try:
-        return datetime.fromisoformat(raw)
-    except ValueError:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
         return None
 
 
@@ -162,16 +172,19 @@ def update_minmax(current: Tuple[datetime | None, datetime | None], dt: datetime
     return mn, mx
 
 
-def push_top(heap: List[Tuple[float, dict]], item: dict, key: str, top_n: int) -> None:
-    import heapq
+# Insertion sequence for heap entries: breaks score ties without ever comparing the items.
+_TOP_COUNTER = count(1)
+
+
+def top_accepts(heap: List[Tuple[float, int, dict]], score: float, top_n: int) -> bool:
+    """True if an entry with `score` would be kept by push_top (lets callers skip building it)."""
+    return top_n > 0 and (len(heap) < top_n or score > heap[0][0])
+
 
-    score = float(item.get(key, 0.0))
+def push_top(heap: List[Tuple[float, int, dict]], score: float, item: dict, top_n: int) -> None:
     if top_n <= 0:
         return
-    if not hasattr(push_top, "counter"):
-        push_top.counter = 0  # type: ignore[attr-defined]
-    push_top.counter += 1  # type: ignore[attr-defined]
-    entry = (score, push_top.counter, item)  # type: ignore[attr-defined]
+    entry = (score, next(_TOP_COUNTER), item)
     if len(heap) < top_n:
         heapq.heappush(heap, entry)
     else:
@@ -179,21 +192,42 @@ def push_top(heap: List[Tuple[float, dict]], item: dict, key: str, top_n: int) -
             heapq.heappushpop(heap, entry)
 
 
+def top_record(
+    doc_id: str | None, doc_type: str, submolt: str | None, created_at: str | None, cleaned: str, scores: dict
+) -> dict:
+    record = {
+        "doc_id": doc_id,
+        "doc_type": doc_type,
+        "submolt": submolt or "unknown",
+        "created_at": created_at,
+        "text_excerpt": (cleaned[:200] + "…") if len(cleaned) > 200 else cleaned,
+    }
+    record.update(scores)
+    return record
+
+
+def write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
 def write_csv(path: Path, rows: Iterable[dict], fieldnames: List[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({k: row.get(k) for k in fieldnames})
+    with path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows([row.get(k) for k in fieldnames] for row in rows)
 
 
 def _dot(a: List[float], b: List[float]) -> float:
-    return sum(x * y for x, y in zip(a, b))
+    return sum(map(operator.mul, a, b))
 
 
 def _mat_vec(mat: List[List[float]], vec: List[float]) -> List[float]:
-    return [sum(row[i] * vec[i] for i in range(len(vec))) for row in mat]
+    return [sum(map(operator.mul, row, vec)) for row in mat]
 
 
 def _normalize(vec: List[float]) -> List[float]:
@@ -212,6 +246,10 @@ def _power_iteration(mat: List[List[float]], n_iter: int = 80) -> List[float]:
 
 
 def pca_2d_fallback(X: List[List[float]]) -> List[List[float]]:
+    """
+    Pure-Python PCA used only when NumPy is missing (which rules out a Numba JIT as well), so the
+    inner products run through map(operator.mul, ...) to stay in C as much as possible.
+    """
     n = len(X)
     if n == 0:
         return []
@@ -232,15 +270,20 @@ def pca_2d_fallback(X: List[List[float]]) -> List[List[float]]:
     for row in X:
         Xn.append([(row[i] - mean[i]) / std[i] for i in range(d)])
 
+    # Accumulate the upper triangle only (hoisting row[i]/cov[i]) and mirror it afterwards.
     cov = [[0.0 for _ in range(d)] for _ in range(d)]
     for row in Xn:
         for i in range(d):
-            for j in range(d):
-                cov[i][j] += row[i] * row[j]
+            ri = row[i]
+            cov_i = cov[i]
+            for j in range(i, d):
+                cov_i[j] += ri * row[j]
     denom = max(1, n - 1)
     for i in range(d):
-        for j in range(d):
-            cov[i][j] /= denom
+        cov_i = cov[i]
+        for j in range(i, d):
+            cov_i[j] /= denom
+            cov[j][i] = cov_i[j]
 
     v1 = _power_iteration(cov)
     lambda1 = _dot(v1, _mat_vec(cov, v1))
@@ -253,6 +296,27 @@ def pca_2d_fallback(X: List[List[float]]) -> List[List[float]]:
     return coords
 
 
+def pca_2d(X: List[List[float]]) -> List[List[float]]:
+    """
+    Project standardized rows onto their top-2 principal axes. With NumPy this is the eigh of the
+    covariance matrix, whose eigenvector signs fix the orientation the site plots (an SVD would
+    flip axes); without it, pca_2d_fallback.
+    """
+    if np is None:
+        return pca_2d_fallback(X)
+    A = np.array(X, dtype=float)
+    if A.shape[0] < 2:
+        return np.zeros((A.shape[0], 2)).tolist()
+    mean = A.mean(axis=0)
+    std = A.std(axis=0)
+    std[std == 0] = 1.0
+    An = (A - mean) / std
+    cov = np.cov(An, rowvar=False)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    order = np.argsort(eigvals)[::-1]
+    return (An @ eigvecs[:, order[:2]]).tolist()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Aggregate coverage, ontology, interference and incidence metrics.")
     parser.add_argument("--posts", default="data/raw/api_fetch/posts.jsonl")
@@ -283,14 +347,15 @@ def main() -> None:
     comment_created_range = (None, None)
 
     concept_counts: Counter[str] = Counter()
-    concept_pairs: Counter[Tuple[str, str]] = Counter()
+    concept_pairs: Counter[int] = Counter()
 
     feature_totals = Counter()
     feature_totals_posts = Counter()
     feature_totals_comments = Counter()
     doc_counts = {"all": 0, "posts": 0, "comments": 0}
 
-    submolt_features: Dict[str, Counter] = defaultdict(Counter)
+    # Per-submolt feature sums, indexed by FEATURES_SUBMOLT_ID.
+    submolt_features: Dict[str, List[int]] = defaultdict(lambda: [0] * len(FEATURES_SUBMOLT))
     submolt_docs: Counter = Counter()
 
     interference_totals = Counter()
@@ -301,8 +366,8 @@ def main() -> None:
     incidence_totals_posts = Counter()
     incidence_totals_comments = Counter()
 
-    top_interference: List[Tuple[float, dict]] = []
-    top_incidence: List[Tuple[float, dict]] = []
+    top_interference: List[Tuple[float, int, dict]] = []
+    top_incidence: List[Tuple[float, int, dict]] = []
 
     post_submolt: Dict[str, str] = {}
 
@@ -330,66 +395,53 @@ def main() -> None:
         doc_counts["all"] += 1
 
         cleaned = clean_text(text)
-        tokens = [t for t in tokenize(cleaned) if len(t) >= 3 and t not in STOPWORDS and t.isalpha()]
-        concept_set = sorted({t for t in tokens if t in CONCEPTS})
-        for concept in concept_set:
-            concept_counts[concept] += 1
-        if len(concept_set) >= 2:
-            for a, b in combinations(concept_set, 2):
-                concept_pairs[(a, b)] += 1
-
-        signals = language_signals(text)
-        feature_totals.update(signals)
-        if doc_type == "post":
-            feature_totals_posts.update(signals)
-        else:
-            feature_totals_comments.update(signals)
+        concept_ids = sorted({CONCEPT_ID[m.lower()] for m in CONCEPTS_RE.findall(cleaned)})
+        for i, a in enumerate(concept_ids):
+            concept_counts[CONCEPT_NAMES[a]] += 1
+            base = a << 8
+            for b in concept_ids[i + 1:]:
+                concept_pairs[base | b] += 1
+
+        # Clean/normalize once and share the result with every scorer below.
+        normalized = normalize_text(text)
+        signals = language_signals(text, normalized=normalized)
+        is_post = doc_type == "post"
+        scope_totals = feature_totals_posts if is_post else feature_totals_comments
+        for k, v in signals.items():
+            feature_totals[k] += v
+            scope_totals[k] += v
 
         if submolt:
             submolt_docs[submolt] += 1
-            for key in FEATURES_SUBMOLT:
-                if key in signals:
-                    submolt_features[submolt][key] += signals.get(key, 0)
+            vec = submolt_features[submolt]
+            for key in signals.keys() & FEATURES_SUBMOLT_SET:
+                vec[FEATURES_SUBMOLT_ID[key]] += signals[key]
 
-        inter = interference_score(text)
+        inter = interference_score(text, cleaned=cleaned)
+        scope_totals = interference_totals_posts if is_post else interference_totals_comments
         for k, v in inter.items():
             interference_totals[k] += v
-            if doc_type == "post":
-                interference_totals_posts[k] += v
-            else:
-                interference_totals_comments[k] += v
+            scope_totals[k] += v
 
-        incidence = human_incidence_score(text)
+        incidence = human_incidence_score(text, normalized=normalized)
+        scope_totals = incidence_totals_posts if is_post else incidence_totals_comments
         for k, v in incidence.items():
             if not isinstance(v, (int, float)):
                 continue
             incidence_totals[k] += v
-            if doc_type == "post":
-                incidence_totals_posts[k] += v
-            else:
-                incidence_totals_comments[k] += v
-
-        record = {
-            "doc_id": doc_id,
-            "doc_type": doc_type,
-            "submolt": submolt or "unknown",
-            "created_at": created_at,
-            "text_excerpt": (cleaned[:200] + "…") if len(cleaned) > 200 else cleaned,
-        }
-        record.update(inter)
+            scope_totals[k] += v
+
+        # Records are only built for documents that make it into a top-N heap.
         # Rank top docs by semantic interference (injection/disclaimer), not by formatting/noise.
-        if float(record.get("score_semantic", 0.0)) > 0.0:
-            push_top(top_interference, record, "score_semantic", args.top_docs)
-
-        record_inc = {
-            "doc_id": doc_id,
-            "doc_type": doc_type,
-            "submolt": submolt or "unknown",
-            "created_at": created_at,
-            "text_excerpt": (cleaned[:200] + "…") if len(cleaned) > 200 else cleaned,
-        }
-        record_inc.update(incidence)
-        push_top(top_incidence, record_inc, "human_incidence_score", args.top_docs)
+        score_semantic = float(inter.get("score_semantic", 0.0))
+        if score_semantic > 0.0 and top_accepts(top_interference, score_semantic, args.top_docs):
+            record = top_record(doc_id, doc_type, submolt, created_at, cleaned, inter)
+            push_top(top_interference, score_semantic, record, args.top_docs)
+
+        score_incidence = float(incidence.get("human_incidence_score", 0.0))
+        if top_accepts(top_incidence, score_incidence, args.top_docs):
+            record = top_record(doc_id, doc_type, submolt, created_at, cleaned, incidence)
+            push_top(top_incidence, score_incidence, record, args.top_docs)
 
     for post in iter_jsonl(posts_path):
         pid = post.get("id")
@@ -421,8 +473,7 @@ def main() -> None:
     coverage["comments_created_min"] = comment_created_range[0].isoformat() if comment_created_range[0] else None
     coverage["comments_created_max"] = comment_created_range[1].isoformat() if comment_created_range[1] else None
 
-    with (out_dir / "coverage_quality.json").open("w", encoding="utf-8") as f:
-        json.dump(coverage, f, ensure_ascii=False, indent=2)
+    write_json(out_dir / "coverage_quality.json", coverage)
 
     def rows_for_features(scope: str, totals: Counter, doc_count: int):
         for key, count in totals.items():
@@ -442,8 +493,7 @@ def main() -> None:
     submolt_rows = []
     for sub, count in submolt_docs.items():
         row = {"submolt": sub, "doc_count": count}
-        for key in FEATURES_SUBMOLT:
-            row[key] = submolt_features[sub].get(key, 0)
+        row.update(zip(FEATURES_SUBMOLT, submolt_features[sub]))
         submolt_rows.append(row)
 
     submolt_rows.sort(key=lambda r: r["doc_count"], reverse=True)
@@ -476,23 +526,7 @@ def main() -> None:
 
     if embedding_rows:
         raw = [[r[key] for key in FEATURES_SUBMOLT] for r in embedding_rows]
-        if np is not None:
-            X = np.array(raw, dtype=float)
-            if X.shape[0] >= 2:
-                mean = X.mean(axis=0)
-                std = X.std(axis=0)
-                std[std == 0] = 1.0
-                Xn = (X - mean) / std
-                cov = np.cov(Xn, rowvar=False)
-                eigvals, eigvecs = np.linalg.eigh(cov)
-                order = np.argsort(eigvals)[::-1]
-                W = eigvecs[:, order[:2]]
-                coords = Xn @ W
-            else:
-                coords = np.zeros((X.shape[0], 2))
-            coords_list = coords.tolist()
-        else:
-            coords_list = pca_2d_fallback(raw)
+        coords_list = pca_2d(raw)
 
         coord_rows = []
         for idx, row in enumerate(embedding_rows):
@@ -522,11 +556,11 @@ def main() -> None:
 
     pair_rows = [
         {
-            "concept_a": a,
-            "concept_b": b,
+            "concept_a": CONCEPT_NAMES[key >> 8],
+            "concept_b": CONCEPT_NAMES[key & 0xFF],
             "count": count,
         }
-        for (a, b), count in concept_pairs.most_common(args.top_pairs)
+        for key, count in concept_pairs.most_common(args.top_pairs)
     ]
     write_csv(out_dir / "ontology_cooccurrence_top.csv", pair_rows, ["concept_a", "concept_b", "count"])
 
@@ -4,10 +4,16 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-from collections import Counter
+from array import array
 from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 
 DEFAULT_THRESHOLDS = "0.70,0.75,0.80,0.85,0.90,0.93,0.95"
 
@@ -30,10 +36,32 @@ def parse_thresholds(raw: str) -> list[float]:
     return uniq
 
 
-def topk(counter: Counter[str], k: int) -> list[dict[str, object]]:
-    items = counter.most_common(k)
-    total = sum(counter.values()) or 1
-    return [{"key": key, "count": int(count), "share": float(count) / float(total)} for key, count in items]
+def write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def key_id(raw: str, index: dict[str, int]) -> int:
+    """Normalize a lang/submolt field ("unknown" when blank) and return its id in `index`."""
+    key = (raw or "unknown").strip() or "unknown"
+    return index.setdefault(key, len(index))
+
+
+def topk(ids: np.ndarray, positions: np.ndarray, names: list[str], k: int) -> list[dict[str, object]]:
+    """
+    Top-K keys in Counter.most_common order: count desc, ties broken by first appearance, where
+    `positions` holds the original (file-order) row index of each id.
+    """
+    counts = np.bincount(ids, minlength=len(names))
+    first = np.full(len(names), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, ids, positions)
+    present = np.flatnonzero(counts)
+    ranked = present[np.lexsort((first[present], -counts[present]))][: max(k, 0)]
+    total = len(ids) or 1
+    return [{"key": names[i], "count": int(counts[i]), "share": float(counts[i]) / float(total)} for i in ranked]
 
 
 def main() -> int:
@@ -60,68 +88,92 @@ def main() -> int:
     if not thresholds:
         raise SystemExit("No thresholds provided.")
 
-    # Aggregates per threshold.
-    counts = {t: 0 for t in thresholds}
-    same_submolt = {t: 0 for t in thresholds}
-    lang_counts = {t: Counter() for t in thresholds}
-    post_submolt_counts = {t: Counter() for t in thresholds}
-    comment_submolt_counts = {t: Counter() for t in thresholds}
-
-    # Score histogram (0.00-0.99 in 0.01 bins; 1.00 collapses into last bin).
-    hist_bins = [0] * 100
     n_rows = 0
-    min_score = 1.0
-    max_score = 0.0
+
+    # One entry per parsed row, kept in typed buffers (no boxed floats/ints) that NumPy reads
+    # without copying. Strings are mapped to small int ids so the per-threshold aggregates can
+    # be computed after the scan. Post and comment submolts share one vocabulary, so
+    # "same submolt" is an id comparison.
+    scores = array("d")
+    lang_ids = array("q")
+    post_sub_ids = array("q")
+    comment_sub_ids = array("q")
+    lang_index: dict[str, int] = {}
+    submolt_index: dict[str, int] = {}
+    lang_raw_ids: dict[str, int] = {}
+    submolt_raw_ids: dict[str, int] = {}
 
     print(f"[transmission] Reading {matches_path} ...")
-    with matches_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
+    with matches_path.open("r", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Absent columns point one past the header; rows are padded with "" up to that slot,
+        # which reads the same as DictReader's missing values.
+        i_score, i_lang, i_post_sub, i_comment_sub = (
+            header.index(name) if name in header else len(header)
+            for name in ("score", "lang", "post_submolt", "comment_submolt")
+        )
+        width = max(i_score, i_lang, i_post_sub, i_comment_sub) + 1
         for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
             n_rows += 1
             if n_rows % 200_000 == 0:
                 print(f"[transmission] Processed {n_rows:,} rows ...")
             try:
-                score = float(row.get("score") or 0.0)
+                score = float(row[i_score] or 0.0)
             except Exception:
                 continue
 
-            if score < min_score:
-                min_score = score
-            if score > max_score:
-                max_score = score
-            idx = int(score * 100)
-            if idx < 0:
-                idx = 0
-            if idx > 99:
-                idx = 99
-            hist_bins[idx] += 1
-
-            lang = (row.get("lang") or "unknown").strip() or "unknown"
-            post_sub = (row.get("post_submolt") or "unknown").strip() or "unknown"
-            comment_sub = (row.get("comment_submolt") or "unknown").strip() or "unknown"
-            is_same_sub = post_sub == comment_sub
-
-            for t in thresholds:
-                if score < t:
-                    continue
-                counts[t] += 1
-                lang_counts[t][lang] += 1
-                post_submolt_counts[t][post_sub] += 1
-                comment_submolt_counts[t][comment_sub] += 1
-                if is_same_sub:
-                    same_submolt[t] += 1
+            scores.append(score)
+            # Raw field -> id caches: repeated values skip normalization entirely.
+            raw = row[i_lang]
+            lid = lang_raw_ids.get(raw)
+            if lid is None:
+                lid = lang_raw_ids[raw] = key_id(raw, lang_index)
+            lang_ids.append(lid)
+            raw = row[i_post_sub]
+            sid = submolt_raw_ids.get(raw)
+            if sid is None:
+                sid = submolt_raw_ids[raw] = key_id(raw, submolt_index)
+            post_sub_ids.append(sid)
+            raw = row[i_comment_sub]
+            sid = submolt_raw_ids.get(raw)
+            if sid is None:
+                sid = submolt_raw_ids[raw] = key_id(raw, submolt_index)
+            comment_sub_ids.append(sid)
+
+    score_arr = np.frombuffer(scores, dtype=np.float64)
+    min_score = float(min(1.0, score_arr.min())) if score_arr.size else 1.0
+    max_score = float(max(0.0, score_arr.max())) if score_arr.size else 0.0
+    # Score histogram (0.00-0.99 in 0.01 bins; 1.00 collapses into last bin).
+    hist_bins = np.bincount(np.clip(score_arr * 100, 0, 99).astype(np.int64), minlength=100).tolist()
+
+    # Sort once by score: rows passing threshold t are the suffix starting at searchsorted(t).
+    order = np.argsort(score_arr, kind="stable")
+    sorted_scores = score_arr[order]
+    lang_sorted = np.frombuffer(lang_ids, dtype=np.int64)[order]
+    post_sorted = np.frombuffer(post_sub_ids, dtype=np.int64)[order]
+    comment_sorted = np.frombuffer(comment_sub_ids, dtype=np.int64)[order]
+    same_sorted = post_sorted == comment_sorted
+    lang_names = list(lang_index)
+    submolt_names = list(submolt_index)
 
     thresholds_out: list[dict[str, object]] = []
     for t in sorted(thresholds):
-        c = counts[t]
+        k = int(np.searchsorted(sorted_scores, t, side="left"))
+        c = len(sorted_scores) - k
+        positions = order[k:]
         thresholds_out.append(
             {
                 "threshold": t,
                 "pair_count": int(c),
-                "share_same_submolt": (float(same_submolt[t]) / float(c)) if c else 0.0,
-                "top_lang": topk(lang_counts[t], args.topk),
-                "top_post_submolt": topk(post_submolt_counts[t], args.topk),
-                "top_comment_submolt": topk(comment_submolt_counts[t], args.topk),
+                "share_same_submolt": (float(same_sorted[k:].sum()) / float(c)) if c else 0.0,
+                "top_lang": topk(lang_sorted[k:], positions, lang_names, args.topk),
+                "top_post_submolt": topk(post_sorted[k:], positions, submolt_names, args.topk),
+                "top_comment_submolt": topk(comment_sorted[k:], positions, submolt_names, args.topk),
             }
         )
 
@@ -138,8 +190,7 @@ def main() -> int:
         ],
     }
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    write_json(out_path, payload)
     print(f"[transmission] Wrote {out_path}")
     return 0
 
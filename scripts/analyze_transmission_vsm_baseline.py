@@ -2,20 +2,27 @@
 from __future__ import annotations
 
 import argparse
-import csv
 import json
 import math
-import random
+import re
 import sys
-from collections import Counter, defaultdict
-from dataclasses import dataclass, field
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable, Optional
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics import roc_auc_score
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from scipy.stats import rankdata
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
@@ -25,18 +32,51 @@ if str(SRC) not in sys.path:
 from moltbook_analysis.analyze.text import clean_text  # noqa: E402
 
 
-def iter_jsonl(path: Path) -> Iterable[dict]:
+# Rows per HashedTfidf.transform call when scoring pairs; bounds the size of the CSR batches.
+TRANSFORM_BATCH = 8192
+
+# Top-level and nested "id" string values without escapes. Lines with an "id" key it cannot read
+# (escaped or non-string value) are parsed in full instead of being screened out.
+ID_FIELD_RE = re.compile(rb'"id"\s*:\s*"([^"\\]+)"')
+
+
+def _loads_line(line: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass  # json.loads gets the final say on lines orjson is stricter about
+    return json.loads(line)
+
+
+def iter_wanted_jsonl(path: Path, wanted: set[str], label: str, report_every: int) -> Iterable[dict]:
+    """
+    Yield records from a JSONL file whose lines mention one of the `wanted` ids. A regex over the raw
+    bytes screens each line, so only candidates are decoded; lines where it misses an "id" key are
+    decoded too. Callers still check the parsed "id".
+    """
     if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except json.JSONDecodeError:
-                continue
+        return
+    # Matched against the raw bytes of each line, so no line is decoded (to str or JSON) just to be rejected.
+    wanted_raw = frozenset(w.encode("utf-8") for w in wanted)
+    is_wanted = wanted_raw.__contains__
+    scanned = 0
+    with path.open("rb") as f:
+        while True:
+            lines = f.readlines(1 << 20)
+            if not lines:
+                break
+            for line in lines:
+                scanned += 1
+                if scanned % report_every == 0:
+                    print(f"[vsm] scanned {label} {scanned:,}")
+                ids = ID_FIELD_RE.findall(line)
+                if not any(map(is_wanted, ids)) and len(ids) == line.count(b'"id"'):
+                    continue
+                try:
+                    yield _loads_line(line)
+                except ValueError:
+                    continue
 
 
 def post_text(post: dict) -> str:
@@ -49,20 +89,29 @@ def comment_text(comment: dict) -> str:
     return (comment.get("content") or "").strip()
 
 
-@dataclass
-class Reservoir:
-    k: int
-    seen: int = 0
-    items: list[dict] = field(default_factory=list)
-
-    def add(self, item: dict, rng: random.Random) -> None:
-        self.seen += 1
-        if len(self.items) < self.k:
-            self.items.append(item)
-            return
-        j = rng.randrange(self.seen)
-        if j < self.k:
-            self.items[j] = item
+def read_match_table(matches_path: Path) -> tuple[pa.Table, int]:
+    """
+    Read post_id, comment_id, score, lang from the matches CSV as string columns (multi-threaded
+    parse). Rows with the wrong number of fields are skipped; returns (table, skipped_rows).
+    """
+    columns = ["post_id", "comment_id", "score", "lang"]
+    skipped: list = []
+
+    def skip_row(row) -> str:
+        skipped.append(row.number)  # list.append is atomic; parse threads may call this concurrently
+        return "skip"
+
+    table = pa_csv.read_csv(
+        matches_path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=64 << 20),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=skip_row),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            include_missing_columns=True,
+            column_types={c: pa.string() for c in columns},
+        ),
+    )
+    return table, len(skipped)
 
 
 def percentile(values: np.ndarray, q: float) -> float:
@@ -73,11 +122,7 @@ def percentile(values: np.ndarray, q: float) -> float:
 
 def load_posts(posts_path: Path, wanted: set[str]) -> dict[str, str]:
     out: dict[str, str] = {}
-    scanned = 0
-    for post in iter_jsonl(posts_path):
-        scanned += 1
-        if scanned % 50_000 == 0:
-            print(f"[vsm] scanned posts {scanned:,} (found {len(out):,}/{len(wanted):,})")
+    for post in iter_wanted_jsonl(posts_path, wanted, "posts", 50_000):
         pid = post.get("id")
         if not isinstance(pid, str) or pid not in wanted:
             continue
@@ -89,11 +134,7 @@ def load_posts(posts_path: Path, wanted: set[str]) -> dict[str, str]:
 
 def load_comments(comments_path: Path, wanted: set[str]) -> dict[str, str]:
     out: dict[str, str] = {}
-    scanned = 0
-    for comment in iter_jsonl(comments_path):
-        scanned += 1
-        if scanned % 200_000 == 0:
-            print(f"[vsm] scanned comments {scanned:,} (found {len(out):,}/{len(wanted):,})")
+    for comment in iter_wanted_jsonl(comments_path, wanted, "comments", 200_000):
         cid = comment.get("id")
         if not isinstance(cid, str) or cid not in wanted:
             continue
@@ -105,7 +146,122 @@ def load_comments(comments_path: Path, wanted: set[str]) -> dict[str, str]:
 
 def rowwise_cosine(a, b) -> np.ndarray:
     # a and b are sparse matrices with same shape (n, d); TF-IDF vectors are L2-normalized by default.
-    return np.asarray(a.multiply(b).sum(axis=1)).reshape(-1)
+    return np.asarray(a.multiply(b).sum(axis=1), dtype=np.float32).reshape(-1)
+
+
+def pearson(x: np.ndarray, y: np.ndarray) -> float:
+    """Pearson r of two equal-length vectors (population moments, computed in float64)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return float(np.einsum("i,i->", x - x.mean(), y - y.mean()) / (x.size * x.std() * y.std()))
+
+
+def rank_auc(pos: np.ndarray, neg: np.ndarray) -> float:
+    """ROC AUC of `pos` (label 1) vs `neg` (label 0) scores via the Mann-Whitney rank sum; ties get average ranks."""
+    ranks = rankdata(np.concatenate([pos, neg]).astype(np.float64))
+    n_pos, n_neg = pos.size, neg.size
+    return float((ranks[:n_pos].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+class HashedTfidf:
+    """
+    TF-IDF over hashed word n-grams (HashingVectorizer + TfidfTransformer), so fitting never builds a
+    vocabulary dict. Hashed columns are pruned like TfidfVectorizer's min_df / max_df / max_features
+    (document-frequency bounds, then the most frequent columns); the rest of the defaults match.
+    """
+
+    def __init__(
+        self,
+        ngram_range: tuple[int, int] = (1, 2),
+        min_df: int = 2,
+        max_df: float = 0.95,
+        max_features: int = 60_000,
+        n_features: int = 2**20,
+        dtype=np.float32,
+    ) -> None:
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None,
+            dtype=dtype,
+        )
+        self.tfidf = TfidfTransformer()
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.columns = np.zeros(0, dtype=np.int64)
+
+    def fit(self, corpus: list[str]) -> "HashedTfidf":
+        counts = self.hasher.transform(corpus)
+        n_features = counts.shape[1]
+        # CSR holds one entry per (doc, column), so counting column ids gives document frequency.
+        dfs = np.bincount(counts.indices, minlength=n_features)
+        tfs = np.bincount(counts.indices, weights=counts.data, minlength=n_features)
+        columns = np.flatnonzero((dfs >= self.min_df) & (dfs <= self.max_df * counts.shape[0]))
+        if columns.size > self.max_features:
+            columns = np.sort(columns[np.argsort(-tfs[columns], kind="stable")[: self.max_features]])
+        self.columns = columns
+        self.tfidf.fit(counts[:, columns])
+        return self
+
+    def transform(self, texts: list[str]):
+        return self.tfidf.transform(self.hasher.transform(texts)[:, self.columns])
+
+
+def batched_cosines(vec: HashedTfidf, a_texts: list[str], b_texts: list[str]) -> np.ndarray:
+    """Row-wise TF-IDF cosine of aligned text lists, transforming TRANSFORM_BATCH rows at a time."""
+    out = np.zeros(len(a_texts), dtype=np.float32)
+    for start in range(0, len(a_texts), TRANSFORM_BATCH):
+        end = start + TRANSFORM_BATCH
+        out[start:end] = rowwise_cosine(vec.transform(a_texts[start:end]), vec.transform(b_texts[start:end]))
+    return out
+
+
+def compute_metrics_for_mask(
+    sim_m_all: np.ndarray,
+    sim_s_all: np.ndarray,
+    m_scores: Optional[np.ndarray],
+    mask: np.ndarray,
+    s_mask: np.ndarray,
+) -> dict[str, object]:
+    """Metrics for the matched rows in `mask` vs the shuffled rows in `s_mask` of the precomputed similarities."""
+    emb = m_scores[mask] if m_scores is not None else np.zeros(0)
+    n_matched = int(mask.sum())
+    n_shuffled = int(s_mask.sum())
+
+    if 2 * (n_matched + n_shuffled) < 10 or n_matched < 10 or n_shuffled < 10:
+        return {"n_matched": n_matched, "n_shuffled": n_shuffled, "skipped": True, "reason": "insufficient_samples"}
+
+    sim_m = sim_m_all[mask]
+    sim_s = sim_s_all[s_mask]
+
+    # Some languages can yield all-zero vectors; guard.
+    corr = 0.0
+    if emb.size >= 10 and np.std(emb) > 1e-9 and np.std(sim_m) > 1e-9:
+        corr = pearson(emb, sim_m)
+
+    auc = 0.0
+    y_score = np.concatenate([sim_m, sim_s])
+    if len(np.unique(y_score)) > 3:
+        auc = rank_auc(sim_m, sim_s)
+
+    return {
+        "n_matched": int(sim_m.size),
+        "n_shuffled": int(sim_s.size),
+        "vsm_matched": {
+            "mean": float(sim_m.mean()) if sim_m.size else 0.0,
+            "p50": percentile(sim_m, 0.50),
+            "p90": percentile(sim_m, 0.90),
+        },
+        "vsm_shuffled": {
+            "mean": float(sim_s.mean()) if sim_s.size else 0.0,
+            "p50": percentile(sim_s, 0.50),
+            "p90": percentile(sim_s, 0.90),
+        },
+        "corr_embedding_vs_vsm": corr,
+        "auc_vsm_matched_vs_shuffled": auc,
+    }
 
 
 def main() -> int:
@@ -121,7 +277,7 @@ def main() -> int:
     parser.add_argument("--comments", default="data/raw/api_fetch/comments.jsonl", help="Comentarios raw (API fetch).")
     parser.add_argument("--out", default="data/derived/transmission_vsm_baseline.json", help="JSON de salida.")
     parser.add_argument("--seed", type=int, default=42, help="Seed reproducible.")
-    parser.add_argument("--per-bin", type=int, default=400, help="Reservoir size por bin de score.")
+    parser.add_argument("--per-bin", type=int, default=400, help="Pares muestreados por bin de score.")
     parser.add_argument("--min-lang-pairs", type=int, default=200, help="Min pares por idioma para reporte separado.")
     args = parser.parse_args()
 
@@ -130,7 +286,7 @@ def main() -> int:
     comments_path = Path(args.comments)
     out_path = Path(args.out)
 
-    rng = random.Random(args.seed)
+    rng = np.random.default_rng(args.seed)
 
     bins = [
         {"name": "0.95-1.00", "lo": 0.95, "hi": 1.00001},
@@ -139,33 +295,37 @@ def main() -> int:
         {"name": "0.80-0.85", "lo": 0.80, "hi": 0.85},
         {"name": "0.75-0.80", "lo": 0.75, "hi": 0.80},
     ]
-    reservoirs = {b["name"]: Reservoir(args.per_bin) for b in bins}
 
-    print(f"[vsm] Sampling pairs from {matches_path} ...")
-    total_rows = 0
-    for row in csv.DictReader(matches_path.open("r", encoding="utf-8", newline="")):
-        total_rows += 1
-        if total_rows % 250_000 == 0:
-            kept = sum(len(r.items) for r in reservoirs.values())
-            print(f"[vsm] processed {total_rows:,} rows (kept {kept:,} sample pairs)")
-        try:
-            score = float(row.get("score") or 0.0)
-        except Exception:
-            continue
-        item = {
-            "post_id": row.get("post_id"),
-            "comment_id": row.get("comment_id"),
-            "score": score,
-            "lang": (row.get("lang") or "unknown").strip() or "unknown",
-        }
-        for b in bins:
-            if score >= b["lo"] and score < b["hi"]:
-                reservoirs[b["name"]].add(item, rng)
-                break
+    # Bin edges in ascending order: np.digitize(score, edges) - 1 == k  <=>  edges[k] <= score < edges[k + 1],
+    # which is bins[-1 - k]. Anything else (below 0.75, above the top edge, NaN) gets no bin.
+    edges = np.array([b["lo"] for b in reversed(bins)] + [bins[0]["hi"]])
 
-    matched_pairs: list[dict] = []
-    for b in bins:
-        matched_pairs.extend(reservoirs[b["name"]].items)
+    print(f"[vsm] Sampling pairs from {matches_path} ...")
+    table, skipped_rows = read_match_table(matches_path)
+    total_rows = table.num_rows + skipped_rows
+    print(f"[vsm] read {total_rows:,} rows ({skipped_rows:,} malformed, skipped)")
+    # Empty/invalid scores become NaN and fall outside every bin.
+    scores = pd.to_numeric(table.column("score").to_numpy(), errors="coerce").astype(np.float64)
+    bin_idx = np.digitize(scores, edges) - 1
+
+    # Uniform sample without replacement of up to --per-bin rows per bin (kept in file order).
+    chosen: list[np.ndarray] = []
+    for k, b in enumerate(reversed(bins)):
+        idx = np.flatnonzero(bin_idx == k)
+        chosen.append(np.sort(rng.choice(idx, size=min(args.per_bin, idx.size), replace=False)))
+    # Report bins high -> low, as listed in `bins`.
+    rows = pa.array(np.concatenate(chosen[::-1]).astype(np.int64))
+    sample = table.take(rows)
+    lang = pc.utf8_trim_whitespace(pc.fill_null(sample.column("lang"), ""))
+    matched_pairs: list[dict] = [
+        {"post_id": post_id, "comment_id": comment_id, "score": score, "lang": lang_}
+        for post_id, comment_id, score, lang_ in zip(
+            sample.column("post_id").to_pylist(),
+            sample.column("comment_id").to_pylist(),
+            scores[rows.to_numpy()].tolist(),
+            pc.if_else(pc.equal(lang, ""), "unknown", lang).to_pylist(),
+        )
+    ]
     # Drop obviously broken rows.
     matched_pairs = [p for p in matched_pairs if isinstance(p.get("post_id"), str) and isinstance(p.get("comment_id"), str)]
 
@@ -174,16 +334,20 @@ def main() -> int:
     print("[vsm] Top langs:", ", ".join([f"{k}:{v}" for k, v in lang_counts.most_common(6)]))
 
     # Build shuffled baseline (same-lang, same pool) by permuting comment_ids within each language.
-    shuffled_pairs: list[dict] = []
-    by_lang: dict[str, list[dict]] = defaultdict(list)
-    for p in matched_pairs:
-        by_lang[p.get("lang") or "unknown"].append(p)
-    for lang, pairs in by_lang.items():
-        post_ids = [p["post_id"] for p in pairs]
-        comment_ids = [p["comment_id"] for p in pairs]
-        rng.shuffle(comment_ids)
-        for post_id, comment_id in zip(post_ids, comment_ids, strict=True):
-            shuffled_pairs.append({"post_id": post_id, "comment_id": comment_id, "lang": lang})
+    # Languages are bucketed by a stable sort, so each language is one contiguous slice to permute.
+    langs_np = np.asarray([p.get("lang") or "unknown" for p in matched_pairs], dtype=str)
+    order = np.argsort(langs_np, kind="stable")
+    langs_np = langs_np[order]
+    post_ids_np = np.asarray([p["post_id"] for p in matched_pairs], dtype=object)[order]
+    comment_ids_np = np.asarray([p["comment_id"] for p in matched_pairs], dtype=object)[order]
+    _, starts = np.unique(langs_np, return_index=True)
+    bounds = np.append(starts, langs_np.size)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        comment_ids_np[start:end] = comment_ids_np[start:end][rng.permutation(end - start)]
+    shuffled_pairs: list[dict] = [
+        {"post_id": post_id, "comment_id": comment_id, "lang": lang}
+        for post_id, comment_id, lang in zip(post_ids_np.tolist(), comment_ids_np.tolist(), langs_np.tolist())
+    ]
 
     wanted_posts = {p["post_id"] for p in matched_pairs}
     wanted_comments = {p["comment_id"] for p in matched_pairs}
@@ -196,105 +360,53 @@ def main() -> int:
     if missing_posts or missing_comments:
         print(f"[vsm] Warning: missing texts posts={missing_posts:,} comments={missing_comments:,}")
 
-    def build_arrays(pairs: list[dict]) -> tuple[list[str], list[str], list[str], Optional[list[float]]]:
-        a_texts: list[str] = []
-        b_texts: list[str] = []
-        langs: list[str] = []
-        emb_scores: Optional[list[float]] = [] if ("score" in (pairs[0] if pairs else {})) else None
-        for p in pairs:
-            post_id = p.get("post_id")
-            comment_id = p.get("comment_id")
-            if not isinstance(post_id, str) or not isinstance(comment_id, str):
-                continue
-            at = post_texts.get(post_id)
-            bt = comment_texts.get(comment_id)
-            if not at or not bt:
-                continue
-            a_texts.append(at)
-            b_texts.append(bt)
-            langs.append(p.get("lang") or "unknown")
-            if emb_scores is not None:
-                emb_scores.append(float(p.get("score") or 0.0))
-        return a_texts, b_texts, langs, emb_scores
+    post_text_series = pd.Series(post_texts, dtype=object)
+    comment_text_series = pd.Series(comment_texts, dtype=object)
+
+    def build_arrays(pairs: list[dict]) -> tuple[list[str], list[str], list[str], Optional[np.ndarray]]:
+        has_scores = bool(pairs) and "score" in pairs[0]
+        df = pd.DataFrame(pairs, columns=["post_id", "comment_id", "lang", "score"])
+        # Non-string or unknown ids map to NaN; NaN and "" texts both fail the length check.
+        a = df["post_id"].map(post_text_series).fillna("")
+        b = df["comment_id"].map(comment_text_series).fillna("")
+        mask = (a.str.len() > 0) & (b.str.len() > 0) if len(df) else np.zeros(0, dtype=bool)
+        langs = df.loc[mask, "lang"].fillna("").replace("", "unknown")
+        emb_scores = df.loc[mask, "score"].fillna(0.0).to_numpy(dtype=np.float64) if has_scores else None
+        return a[mask].tolist(), b[mask].tolist(), langs.tolist(), emb_scores
 
     m_a, m_b, m_langs, m_scores = build_arrays(matched_pairs)
     s_a, s_b, s_langs, _ = build_arrays(shuffled_pairs)
     print(f"[vsm] Usable pairs after text join: matched={len(m_a):,}, shuffled={len(s_a):,}")
 
-    # Compute metrics per language (enough mass) + all.
-    def compute_metrics_for_mask(name: str, mask: np.ndarray) -> dict[str, object]:
-        a_text = [m_a[i] for i in range(len(m_a)) if mask[i]]
-        b_text = [m_b[i] for i in range(len(m_b)) if mask[i]]
-        emb = np.array([m_scores[i] for i in range(len(m_a)) if mask[i]], dtype=float) if m_scores else np.zeros(0)
-        # Shuffled uses same mask by language over the shuffled arrays.
-        s_mask = np.array([s_langs[i] == name for i in range(len(s_a))]) if name != "_all" else np.ones(len(s_a), dtype=bool)
-        sa_text = [s_a[i] for i in range(len(s_a)) if s_mask[i]]
-        sb_text = [s_b[i] for i in range(len(s_a)) if s_mask[i]]
-
-        corpus = a_text + b_text + sa_text + sb_text
-        if len(corpus) < 10 or len(a_text) < 10 or len(sa_text) < 10:
-            return {"n_matched": len(a_text), "n_shuffled": len(sa_text), "skipped": True, "reason": "insufficient_samples"}
-
-        vec = TfidfVectorizer(
-            ngram_range=(1, 2),
-            min_df=2,
-            max_df=0.95,
-            max_features=60_000,
-        )
-        vec.fit(corpus)
-
-        Xp = vec.transform(a_text)
-        Xc = vec.transform(b_text)
-        Xp_s = vec.transform(sa_text)
-        Xc_s = vec.transform(sb_text)
-
-        sim_m = rowwise_cosine(Xp, Xc)
-        sim_s = rowwise_cosine(Xp_s, Xc_s)
-
-        # Some languages can yield all-zero vectors; guard.
-        corr = 0.0
-        if emb.size >= 10 and np.std(emb) > 1e-9 and np.std(sim_m) > 1e-9:
-            corr = float(np.corrcoef(emb, sim_m)[0, 1])
-
-        auc = 0.0
-        try:
-            y = np.concatenate([np.ones(sim_m.size), np.zeros(sim_s.size)])
-            y_score = np.concatenate([sim_m, sim_s])
-            if len(np.unique(y_score)) > 3:
-                auc = float(roc_auc_score(y, y_score))
-        except Exception:
-            auc = 0.0
-
-        return {
-            "n_matched": int(sim_m.size),
-            "n_shuffled": int(sim_s.size),
-            "vsm_matched": {
-                "mean": float(sim_m.mean()) if sim_m.size else 0.0,
-                "p50": percentile(sim_m, 0.50),
-                "p90": percentile(sim_m, 0.90),
-            },
-            "vsm_shuffled": {
-                "mean": float(sim_s.mean()) if sim_s.size else 0.0,
-                "p50": percentile(sim_s, 0.50),
-                "p90": percentile(sim_s, 0.90),
-            },
-            "corr_embedding_vs_vsm": corr,
-            "auc_vsm_matched_vs_shuffled": auc,
-        }
-
-    # Global mask.
-    all_mask = np.ones(len(m_a), dtype=bool)
-    metrics = {"_all": compute_metrics_for_mask("_all", all_mask)}
-
-    # Per-language for those with enough usable pairs.
+    # One TF-IDF space for every report: fit on the full matched+shuffled corpus, score every pair once
+    # (in transform batches, so the full CSR matrices never exist), and let the per-language metrics
+    # slice those similarities.
+    global_corpus = m_a + m_b + s_a + s_b
+    vec = HashedTfidf(ngram_range=(1, 2), min_df=2, max_df=0.95, max_features=60_000, dtype=np.float32)
+    sim_m_all = np.zeros(len(m_a), dtype=np.float32)
+    sim_s_all = np.zeros(len(s_a), dtype=np.float32)
+    if len(global_corpus) >= 10:
+        vec.fit(global_corpus)
+        sim_m_all = batched_cosines(vec, m_a, m_b)
+        sim_s_all = batched_cosines(vec, s_a, s_b)
+    m_langs_arr = np.array(m_langs, dtype=object)
+    s_langs_arr = np.array(s_langs, dtype=object)
+
+    # Global report + per-language reports for languages with enough usable pairs.
+    # Shuffled rows use the same language selection over the shuffled arrays.
+    tasks = {"_all": (np.ones(len(m_a), dtype=bool), np.ones(len(s_a), dtype=bool))}
     usable_lang_counts = Counter(m_langs)
     for lang, n in usable_lang_counts.most_common():
         if lang == "unknown":
             continue
         if n < args.min_lang_pairs:
             continue
-        mask = np.array([l == lang for l in m_langs])
-        metrics[lang] = compute_metrics_for_mask(lang, mask)
+        tasks[lang] = (m_langs_arr == lang, s_langs_arr == lang)
+
+    # Each report only slices the precomputed similarities and takes a few statistics, so run them in turn.
+    metrics = {
+        name: compute_metrics_for_mask(sim_m_all, sim_s_all, m_scores, *masks) for name, masks in tasks.items()
+    }
 
     payload = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -309,6 +421,7 @@ def main() -> int:
             "per_bin": args.per_bin,
             "bins": bins,
             "total_rows_seen": int(total_rows),
+            "rows_skipped_malformed": int(skipped_rows),
             "matched_pairs_sampled": int(len(matched_pairs)),
             "matched_pairs_usable": int(len(m_a)),
             "shuffled_pairs_usable": int(len(s_a)),
@@ -317,6 +430,7 @@ def main() -> int:
         "metrics": metrics,
         "notes": [
             "Esto NO es ground-truth de 'transmision': es un baseline de similitud lexical (TF-IDF) comparado con pares que embeddings consideran similares.",
+            "TF-IDF sobre n-gramas hasheados (2^20 columnas, poda min_df/max_df/max_features por columna); el IDF se ajusta una sola vez sobre todo el corpus (matched+shuffled) y las metricas por idioma usan ese mismo espacio.",
             "El baseline shuffled permuta comment_id dentro del mismo idioma: aproxima pares 'no relacionados' manteniendo distribucion de longitud/idioma.",
             "Interpretacion sugerida: si AUC VSM es alto, una parte del match puede explicarse por solape de tokens; si es bajo, embeddings aporta señal no-lexical.",
         ],
@@ -10,11 +10,14 @@ speech-act signals are comparable across languages (AUD-005).
 
 Design constraints:
 - No backend; labels live in the CSV (versionable, auditable).
-- Resume-safe: we write after every decision.
+- Resume-safe: every decision is appended to a small journal next to the CSV
+  (`<csv>.decisions.jsonl`); the CSV itself is rewritten once when the session
+  ends, and a journal left by an interrupted session is replayed on start.
 """
 
 import argparse
 import datetime as dt
+import json
 from pathlib import Path
 
 import pandas as pd
@@ -37,16 +40,23 @@ NUM_TO_LABEL = {str(i + 1): lab for i, lab in enumerate(ALLOWED[:-1])}
 NUM_TO_LABEL["0"] = "otro"
 
 
+_FOLD_ACCENTS = str.maketrans({"á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u", "ü": "u", "ñ": "n"})
+
+
 def normalize(raw: str) -> str:
-    v = (raw or "").strip().lower()
     # Keep it simple and permissive (accents are handled by evaluation too).
-    return v.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u").replace("ü", "u").replace("ñ", "n")
+    return (raw or "").strip().lower().translate(_FOLD_ACCENTS)
 
 
 def is_valid(label: str) -> bool:
     return normalize(label) in set(ALLOWED)
 
 
+def label_text(value) -> str:
+    # Same reading as the progress count: empty cells (NaN) are "".
+    return "" if pd.isna(value) else str(value)
+
+
 def safe_excerpt(text: str, max_chars: int = 520) -> str:
     t = (text or "").replace("\r", " ").replace("\n", " ").strip()
     if len(t) <= max_chars:
@@ -62,6 +72,28 @@ def backup_once(path: Path) -> None:
     bak.write_bytes(path.read_bytes())
 
 
+def journal_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".decisions.jsonl")
+
+
+def replay_journal(df: pd.DataFrame, journal: Path) -> int:
+    """Apply decisions logged by an interrupted session; returns how many were applied."""
+    if not journal.exists():
+        return 0
+    applied = 0
+    with journal.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                row = int(rec["row"])
+            except (ValueError, KeyError, TypeError):
+                continue  # e.g. a half-written last line
+            if 0 <= row < len(df) and str(df.at[row, "sample_id"]) == str(rec.get("sample_id")):
+                df.at[row, "label_act_es"] = rec.get("label") or ""
+                applied += 1
+    return applied
+
+
 def print_help() -> None:
     print("")
     print("Etiquetado: escribe un numero y Enter.")
@@ -100,82 +132,97 @@ def main() -> None:
 
     backup_once(path)
 
+    journal = journal_path(path)
+    replayed = replay_journal(df, journal)
+    if replayed:
+        df.to_csv(path, index=False)
+        print(f"Recuperadas {replayed} decisiones de {journal}")
+    journal.unlink(missing_ok=True)
+
     idx = 0
     total = len(df)
+    # Scanned once; set_label keeps it current (+1/-1 per decision) instead of rescanning per row.
+    labeled_now = int(df["label_act_es"].fillna("").astype(str).map(is_valid).sum())
     print_help()
 
-    while 0 <= idx < total:
-        row = df.iloc[idx]
-        current = str(row.get("label_act_es") or "").strip()
-        if args.resume and current and is_valid(current):
-            idx += 1
-            continue
-
-        sample_id = row.get("sample_id")
-        lang = row.get("lang") or "unknown"
-        submolt = row.get("submolt") if "submolt" in df.columns else ""
-        pred = str(row.get("pred_act_es") or "").strip()
-        pred_norm = normalize(pred)
-        pred_ok = pred_norm in set(ALLOWED)
-        suggestion = "" if args.blind else (pred_norm if pred_ok else "")
-        score = row.get("pred_act_score")
-        excerpt = safe_excerpt(str(row.get("text_excerpt") or ""), max_chars=int(args.max_chars))
-
-        labeled_now = int(df["label_act_es"].fillna("").astype(str).map(is_valid).sum())
-        remaining = total - labeled_now
-
-        print("")
-        pred_line = "pred=∅" if args.blind else f"pred={pred_norm or 'n/a'} (score={score})"
-        print(f"[{idx+1}/{total}] {sample_id} · lang={lang} · submolt={submolt} · {pred_line}")
-        print("-" * 90)
-        print(excerpt)
-        print("-" * 90)
-        sug_txt = "oculta (--blind)" if args.blind else (suggestion or "∅")
-        print(f"Actual: {normalize(current) if current else '∅'} | Sugerencia: {sug_txt} | Progreso: {labeled_now}/{total} (faltan {remaining})")
-        raw = input("> ").strip()
-
-        if raw == "?":
-            print_help()
-            continue
-        if raw.lower() == "q":
-            break
-        if raw.lower() == "b":
-            idx = max(0, idx - 1)
-            continue
-        if raw.lower() == "s":
-            df.at[idx, "label_act_es"] = ""
-            df.to_csv(path, index=False)
-            idx += 1
-            continue
-        if raw == "":
-            if suggestion:
-                df.at[idx, "label_act_es"] = suggestion
-                df.to_csv(path, index=False)
+    with journal.open("a", encoding="utf-8") as log:
+
+        def set_label(i: int, label: str) -> None:
+            nonlocal labeled_now
+            before = is_valid(label_text(df.at[i, "label_act_es"]))
+            df.at[i, "label_act_es"] = label
+            labeled_now += int(is_valid(label)) - int(before)
+            log.write(json.dumps({"row": i, "sample_id": str(df.at[i, "sample_id"]), "label": label}) + "\n")
+            log.flush()
+
+        while 0 <= idx < total:
+            row = df.iloc[idx]
+            current = str(row.get("label_act_es") or "").strip()
+            if args.resume and current and is_valid(current):
+                idx += 1
+                continue
+
+            sample_id = row.get("sample_id")
+            lang = row.get("lang") or "unknown"
+            submolt = row.get("submolt") if "submolt" in df.columns else ""
+            pred = str(row.get("pred_act_es") or "").strip()
+            pred_norm = normalize(pred)
+            pred_ok = pred_norm in set(ALLOWED)
+            suggestion = "" if args.blind else (pred_norm if pred_ok else "")
+            score = row.get("pred_act_score")
+            excerpt = safe_excerpt(str(row.get("text_excerpt") or ""), max_chars=int(args.max_chars))
+
+            remaining = total - labeled_now
+
+            print("")
+            pred_line = "pred=∅" if args.blind else f"pred={pred_norm or 'n/a'} (score={score})"
+            print(f"[{idx+1}/{total}] {sample_id} · lang={lang} · submolt={submolt} · {pred_line}")
+            print("-" * 90)
+            print(excerpt)
+            print("-" * 90)
+            sug_txt = "oculta (--blind)" if args.blind else (suggestion or "∅")
+            print(f"Actual: {normalize(current) if current else '∅'} | Sugerencia: {sug_txt} | Progreso: {labeled_now}/{total} (faltan {remaining})")
+            raw = input("> ").strip()
+
+            if raw == "?":
+                print_help()
+                continue
+            if raw.lower() == "q":
+                break
+            if raw.lower() == "b":
+                idx = max(0, idx - 1)
+                continue
+            if raw.lower() == "s":
+                set_label(idx, "")
+                idx += 1
+                continue
+            if raw == "":
+                if suggestion:
+                    set_label(idx, suggestion)
+                    idx += 1
+                    continue
+                idx += 1
+                continue
+            if raw in NUM_TO_LABEL:
+                set_label(idx, NUM_TO_LABEL[raw])
+                idx += 1
+                continue
+
+            # Free-form label (allows copy/paste), but must be valid.
+            free = normalize(raw)
+            if free in set(ALLOWED):
+                set_label(idx, free)
                 idx += 1
                 continue
-            idx += 1
-            continue
-        if raw in NUM_TO_LABEL:
-            df.at[idx, "label_act_es"] = NUM_TO_LABEL[raw]
-            df.to_csv(path, index=False)
-            idx += 1
-            continue
-
-        # Free-form label (allows copy/paste), but must be valid.
-        free = normalize(raw)
-        if free in set(ALLOWED):
-            df.at[idx, "label_act_es"] = free
-            df.to_csv(path, index=False)
-            idx += 1
-            continue
-
-        print(f"Entrada invalida: '{raw}'. Usa '?' para ayuda.")
 
+            print(f"Entrada invalida: '{raw}'. Usa '?' para ayuda.")
+
+    # The journal is only dropped once its decisions are in the CSV.
     df.to_csv(path, index=False)
-    labeled_total = int(df["label_act_es"].fillna("").astype(str).map(is_valid).sum())
+    journal.unlink(missing_ok=True)
     print("")
     print(f"Guardado: {path}")
-    print(f"Labeled (valid): {labeled_total}/{total}")
+    print(f"Labeled (valid): {labeled_now}/{total}")
 
 
 if __name__ == "__main__":
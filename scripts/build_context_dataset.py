@@ -4,9 +4,17 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 
 
 def iter_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
@@ -23,129 +31,216 @@ def iter_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
                 continue
 
 
+def write_jsonl(table: pa.Table, path: Path) -> None:
+    """One JSON object per row, streamed from the Arrow table in record batches (nulls as null)."""
+    with path.open("wb") as f:
+        for batch in table.to_batches(max_chunksize=10_000):
+            rows = batch.to_pylist()
+            if not rows:
+                continue
+            if orjson is not None:
+                f.write(b"\n".join(orjson.dumps(row) for row in rows))
+            else:
+                f.write("\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode("utf-8"))
+            f.write(b"\n")
+
+
 def safe_text(value: Any) -> str:
     return str(value) if value is not None else ""
 
 
-def clamp_text(text: str, max_chars: int) -> str:
-    if max_chars <= 0 or len(text) <= max_chars:
-        return text
-    return text[: max_chars - 1] + "…"
+def clamp_texts(texts: pd.Series, max_chars: int) -> pd.Series:
+    if max_chars <= 0 or texts.empty:
+        return texts
+    return texts.where(texts.str.len() <= max_chars, texts.str.slice(0, max_chars - 1) + "…")
+
+
+def join_nonempty(parts: List[pd.Series], sep: str) -> pd.Series:
+    """Row-wise `sep.join(p for p in parts if p)` over aligned string Series."""
+    out = parts[0]
+    for part in parts[1:]:
+        out = out.where(part == "", out.where(out == "", out + sep) + part)
+    return out
 
 
-def build_post_text(post: Dict[str, Any]) -> str:
-    title = safe_text(post.get("title")).strip()
-    content = safe_text(post.get("content")).strip()
+def build_post_text(title: Any, content: Any) -> str:
+    title = safe_text(title).strip()
+    content = safe_text(content).strip()
     if title and content:
         return f"{title}\n{content}"
     return title or content
 
 
-def build_comment_text(comment: Dict[str, Any]) -> str:
-    return safe_text(comment.get("content")).strip()
-
-
-def load_posts(posts_path: Path) -> Dict[str, Dict[str, Any]]:
-    posts: Dict[str, Dict[str, Any]] = {}
+def build_comment_text(content: Any) -> str:
+    return safe_text(content).strip()
+
+
+def comment_score(upvotes: Any) -> float:
+    score = upvotes or 0
+    try:
+        return float(score)
+    except Exception:
+        return 0.0
+
+
+# Only the fields the context datasets use are kept; the raw records are dropped while loading.
+POST_COLUMNS = ["id", "title", "text", "created_at", "submolt", "author_id", "author_name", "run_id"]
+COMMENT_COLUMNS = [
+    "id",
+    "post_id",
+    "parent_id",
+    "text",
+    "score",
+    "created_at",
+    "author_id",
+    "author_name",
+    "depth",
+    "thread_path",
+    "run_id",
+]
+
+
+def frame_by_id(rows: List[Tuple[Any, ...]], columns: List[str]) -> pd.DataFrame:
+    """
+    One row per id, indexed by id: first-seen order, values from the id's last record (the same result
+    as filling a dict keyed by id). Object dtype keeps raw values (None stays None).
+    """
+    df = pd.DataFrame(rows, columns=columns, dtype=object)
+    if df.empty:
+        return df.set_index("id")
+    last = df.drop_duplicates("id", keep="last").set_index("id")
+    return last.loc[df["id"].drop_duplicates().to_numpy()]
+
+
+def load_posts(posts_path: Path) -> pd.DataFrame:
+    rows: List[Tuple[Any, ...]] = []
     for p in iter_jsonl(posts_path):
         pid = p.get("id")
         if not isinstance(pid, str):
             continue
-        posts[pid] = p
-    return posts
+        submolt = p.get("submolt")
+        rows.append(
+            (
+                pid,
+                p.get("title"),
+                build_post_text(p.get("title"), p.get("content")),
+                p.get("created_at"),
+                (submolt or {}).get("name") if isinstance(submolt, dict) else submolt,
+                (p.get("author") or {}).get("id"),
+                (p.get("author") or {}).get("name"),
+                p.get("_run_id"),
+            )
+        )
+    return frame_by_id(rows, POST_COLUMNS)
 
 
-def load_comments(comments_path: Path) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]]]:
-    comments_by_id: Dict[str, Dict[str, Any]] = {}
-    comments_by_post: Dict[str, List[str]] = {}
+def load_comments(comments_path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Comments frame plus `listings`: one (post_key, comment_id) row per comment record in file order,
+    post_key being "" when the record has no string post_id.
+    """
+    rows: List[Tuple[Any, ...]] = []
+    post_keys: List[str] = []
     for c in iter_jsonl(comments_path):
         cid = c.get("id")
         post_id = c.get("post_id")
         if not isinstance(cid, str):
             continue
-        if not isinstance(post_id, str):
-            post_id = ""
-        comments_by_id[cid] = c
-        comments_by_post.setdefault(post_id, []).append(cid)
-    return comments_by_id, comments_by_post
+        rows.append(
+            (
+                cid,
+                post_id,
+                c.get("parent_id"),
+                build_comment_text(c.get("content")),
+                comment_score(c.get("upvotes")),
+                c.get("created_at"),
+                c.get("author_id"),
+                (c.get("author") or {}).get("name"),
+                c.get("depth"),
+                c.get("thread_path"),
+                c.get("_run_id"),
+            )
+        )
+        post_keys.append(post_id if isinstance(post_id, str) else "")
+    listings = pd.DataFrame({"post_key": post_keys, "comment_id": [r[0] for r in rows]}, dtype=object)
+    return frame_by_id(rows, COMMENT_COLUMNS), listings
 
 
-def build_post_context(
-    post: Dict[str, Any],
-    comment_ids: List[str],
-    comments_by_id: Dict[str, Dict[str, Any]],
+def build_post_contexts(
+    posts: pd.DataFrame,
+    comments: pd.DataFrame,
+    listings: pd.DataFrame,
     max_comments: int,
     max_post_chars: int,
     max_comment_chars: int,
-) -> str:
-    base = clamp_text(build_post_text(post), max_post_chars)
-    if not comment_ids or max_comments <= 0:
+) -> pd.Series:
+    """Post text plus a [TOP_COMMENTS] block with its highest-upvoted comments (ties in file order)."""
+    base = clamp_texts(posts["text"], max_post_chars)
+    listed = listings[listings["post_key"].isin(posts.index)]
+    if max_comments <= 0 or listed.empty:
         return base
-    scored: List[Tuple[float, str]] = []
-    for cid in comment_ids:
-        c = comments_by_id.get(cid)
-        if not c:
-            continue
-        score = c.get("upvotes") or 0
-        try:
-            score = float(score)
-        except Exception:
-            score = 0.0
-        scored.append((score, cid))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    picks = [cid for _, cid in scored[:max_comments]]
-    chunks = [base, "\n\n[TOP_COMMENTS]"]
-    for cid in picks:
-        c = comments_by_id.get(cid)
-        if not c:
-            continue
-        text = clamp_text(build_comment_text(c), max_comment_chars)
-        if not text:
-            continue
-        chunks.append(f"- {text}")
-    return "\n".join([c for c in chunks if c])
-
-
-def ancestor_chain(
-    comment: Dict[str, Any],
-    comments_by_id: Dict[str, Dict[str, Any]],
-    max_ancestors: int,
-) -> List[str]:
-    chain: List[str] = []
-    cur = comment.get("parent_id")
-    while cur and len(chain) < max_ancestors:
-        parent = comments_by_id.get(cur)
-        if not parent:
+    rows = comments.index.get_indexer(listed["comment_id"])
+    listed = listed.assign(score=comments["score"].to_numpy()[rows], row=rows)
+    # Stable descending sort keeps file order among equal scores; head() then takes the top K per post.
+    top = listed.sort_values("score", ascending=False, kind="stable").groupby("post_key", sort=False).head(max_comments)
+    # Empty comments still take one of the K slots; they are just not printed.
+    top = top.assign(item=clamp_texts(comments["text"], max_comment_chars).to_numpy()[top["row"].to_numpy()])
+    top = top[top["item"] != ""]
+    items = ("- " + top["item"]).groupby(top["post_key"], sort=False).agg("\n".join)
+    header = pd.Series("", index=posts.index, dtype=object).mask(posts.index.isin(listed["post_key"]), "\n\n[TOP_COMMENTS]")
+    return join_nonempty([base, header, items.reindex(posts.index, fill_value="")], "\n")
+
+
+def ancestor_texts(comments: pd.DataFrame, max_ancestors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nearest non-empty ancestor texts per comment: `chains[i, :counts[i]]`, closest parent first. The walk
+    follows parent_id through loaded comments and stops at a missing parent or after max_ancestors texts.
+    """
+    n = len(comments)
+    texts = comments["text"].to_numpy(dtype=object)
+    parent_ids = comments["parent_id"].to_numpy(dtype=object)
+    parent_row = np.where(parent_ids.astype(bool), comments.index.get_indexer(parent_ids), -1)
+    chains = np.full((n, max(max_ancestors, 0)), "", dtype=object)
+    counts = np.zeros(n, dtype=np.int64)
+    pos = parent_row.copy()
+    # A chain visits at most n comments unless parent_ids loop through empty comments; cap the walk there.
+    for _ in range(n + 1):
+        active = np.flatnonzero((pos >= 0) & (counts < max_ancestors))
+        if active.size == 0:
             break
-        text = build_comment_text(parent)
-        if text:
-            chain.append(text)
-        cur = parent.get("parent_id")
-    return chain
+        found = active[texts[pos[active]] != ""]
+        chains[found, counts[found]] = texts[pos[found]]
+        counts[found] += 1
+        pos[active] = parent_row[pos[active]]
+    return chains, counts
 
 
-def build_comment_context(
-    comment: Dict[str, Any],
-    post: Optional[Dict[str, Any]],
-    comments_by_id: Dict[str, Dict[str, Any]],
+def build_comment_contexts(
+    comments: pd.DataFrame,
+    posts: pd.DataFrame,
     max_post_chars: int,
     max_comment_chars: int,
     max_ancestors: int,
-) -> str:
-    parts: List[str] = []
-    if post:
-        post_text = clamp_text(build_post_text(post), max_post_chars)
-        if post_text:
-            parts.append(f"[POST]\n{post_text}")
-    parents = ancestor_chain(comment, comments_by_id, max_ancestors=max_ancestors)
-    if parents:
-        parts.append("[PARENTS]")
-        for i, text in enumerate(reversed(parents), start=1):
-            parts.append(f"{i}. {clamp_text(text, max_comment_chars)}")
-    comment_text = clamp_text(build_comment_text(comment), max_comment_chars)
-    if comment_text:
-        parts.append(f"[COMMENT]\n{comment_text}")
-    return "\n\n".join(parts)
+) -> pd.Series:
+    """[POST] text, numbered [PARENTS] (oldest first) and the [COMMENT] itself, blank-line separated."""
+    index = comments.index
+    post_row = posts.index.get_indexer(comments["post_id"])
+    # Trailing "" so the -1 rows (post not loaded) pick an empty text.
+    post_texts = np.append(clamp_texts(posts["text"], max_post_chars).to_numpy(dtype=object), "")
+    post_text = pd.Series(post_texts[post_row], index=index, dtype=object)
+    parts = [("[POST]\n" + post_text).where(post_text != "", "")]
+
+    chains, counts = ancestor_texts(comments, max_ancestors)
+    parts.append(pd.Series(np.where(counts > 0, "[PARENTS]", ""), index=index, dtype=object))
+    rows = np.arange(len(comments))
+    for i in range(1, chains.shape[1] + 1):
+        slot = counts - i
+        text = pd.Series(np.where(slot >= 0, chains[rows, np.maximum(slot, 0)], ""), index=index, dtype=object)
+        parts.append((f"{i}. " + clamp_texts(text, max_comment_chars)).where(slot >= 0, ""))
+
+    comment_text = clamp_texts(comments["text"], max_comment_chars)
+    parts.append(("[COMMENT]\n" + comment_text).where(comment_text != "", ""))
+    return join_nonempty(parts, "\n\n")
 
 
 def build_context_dataset(
@@ -158,71 +253,63 @@ def build_context_dataset(
     max_ancestors: int,
 ) -> None:
     posts = load_posts(posts_path)
-    comments_by_id, comments_by_post = load_comments(comments_path)
-
-    post_rows: List[Dict[str, Any]] = []
-    for pid, post in posts.items():
-        context_text = build_post_context(
-            post,
-            comments_by_post.get(pid, []),
-            comments_by_id,
-            max_comments=max_comments,
-            max_post_chars=max_post_chars,
-            max_comment_chars=max_comment_chars,
-        )
-        post_rows.append(
-            {
-                "doc_id": pid,
-                "doc_type": "post",
-                "post_id": pid,
-                "title": post.get("title"),
-                "text": build_post_text(post),
-                "context_text": context_text,
-                "created_at": post.get("created_at"),
-                "submolt": (post.get("submolt") or {}).get("name")
-                if isinstance(post.get("submolt"), dict)
-                else post.get("submolt"),
-                "author_id": (post.get("author") or {}).get("id"),
-                "author_name": (post.get("author") or {}).get("name"),
-                "run_id": post.get("_run_id"),
-            }
-        )
+    comments, listings = load_comments(comments_path)
+
+    post_context = build_post_contexts(
+        posts,
+        comments,
+        listings,
+        max_comments=max_comments,
+        max_post_chars=max_post_chars,
+        max_comment_chars=max_comment_chars,
+    )
+    comment_context = build_comment_contexts(
+        comments,
+        posts,
+        max_post_chars=max_post_chars,
+        max_comment_chars=max_comment_chars,
+        max_ancestors=max_ancestors,
+    )
 
-    comment_rows: List[Dict[str, Any]] = []
-    for cid, comment in comments_by_id.items():
-        post = posts.get(comment.get("post_id"))
-        context_text = build_comment_context(
-            comment,
-            post,
-            comments_by_id,
-            max_post_chars=max_post_chars,
-            max_comment_chars=max_comment_chars,
-            max_ancestors=max_ancestors,
-        )
-        comment_rows.append(
-            {
-                "doc_id": cid,
-                "doc_type": "comment",
-                "post_id": comment.get("post_id"),
-                "parent_id": comment.get("parent_id"),
-                "text": build_comment_text(comment),
-                "context_text": context_text,
-                "created_at": comment.get("created_at"),
-                "author_id": comment.get("author_id"),
-                "author_name": (comment.get("author") or {}).get("name"),
-                "depth": comment.get("depth"),
-                "thread_path": comment.get("thread_path"),
-                "run_id": comment.get("_run_id"),
-            }
-        )
+    # Columns go through plain lists so dtypes are inferred as for a list of row dicts.
+    post_ids = posts.index.tolist()
+    posts_df = pd.DataFrame(
+        {
+            "doc_id": post_ids,
+            "doc_type": ["post"] * len(post_ids),
+            "post_id": post_ids,
+            "title": posts["title"].tolist(),
+            "text": posts["text"].tolist(),
+            "context_text": post_context.tolist(),
+            "created_at": posts["created_at"].tolist(),
+            "submolt": posts["submolt"].tolist(),
+            "author_id": posts["author_id"].tolist(),
+            "author_name": posts["author_name"].tolist(),
+            "run_id": posts["run_id"].tolist(),
+        }
+    )
+    comments_df = pd.DataFrame(
+        {
+            "doc_id": comments.index.tolist(),
+            "doc_type": ["comment"] * len(comments),
+            "post_id": comments["post_id"].tolist(),
+            "parent_id": comments["parent_id"].tolist(),
+            "text": comments["text"].tolist(),
+            "context_text": comment_context.tolist(),
+            "created_at": comments["created_at"].tolist(),
+            "author_id": comments["author_id"].tolist(),
+            "author_name": comments["author_name"].tolist(),
+            "depth": comments["depth"].tolist(),
+            "thread_path": comments["thread_path"].tolist(),
+            "run_id": comments["run_id"].tolist(),
+        }
+    )
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    posts_df = pd.DataFrame(post_rows)
-    comments_df = pd.DataFrame(comment_rows)
-    posts_df.to_json(out_dir / "context_posts.jsonl", orient="records", lines=True, force_ascii=False)
-    comments_df.to_json(out_dir / "context_comments.jsonl", orient="records", lines=True, force_ascii=False)
-    posts_df.to_parquet(out_dir / "context_posts.parquet", index=False)
-    comments_df.to_parquet(out_dir / "context_comments.parquet", index=False)
+    for name, df in (("context_posts", posts_df), ("context_comments", comments_df)):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, out_dir / f"{name}.parquet", compression="zstd")
+        write_jsonl(table, out_dir / f"{name}.jsonl")
 
 
 def main() -> None:
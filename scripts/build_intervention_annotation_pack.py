@@ -2,28 +2,59 @@
 from __future__ import annotations
 
 import argparse
-import csv
 import json
-from collections import Counter
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import pandas as pd
 
-def read_csv(path: Path) -> list[dict[str, str]]:
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def read_csv_df(path: Path) -> pd.DataFrame:
     if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8", newline="") as f:
-        return list(csv.DictReader(f))
+        return pd.DataFrame()
+    # All columns as strings with empty cells kept as "", matching csv.DictReader rows.
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def text_column(df: pd.DataFrame, name: str, default: str = "") -> pd.Series:
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[name].replace("", default) if default else df[name]
+
+
+def numeric_column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Vectorized to_float over a column (missing column -> 0.0)."""
+    if name not in df.columns:
+        return pd.Series(0.0, index=df.index, dtype=float)
+    values = pd.to_numeric(df[name], errors="coerce")
+    bad = values.isna()
+    if bad.any():
+        values[bad] = df.loc[bad, name].map(to_float)
+    return values.astype(float)
 
 
 def write_csv(path: Path, rows: list[dict[str, Any]], fieldnames: list[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({k: row.get(k) for k in fieldnames})
+    # from_records(columns=...) projects each row onto `fieldnames` (missing keys -> empty cells);
+    # CRLF line endings keep the file identical to what csv.DictWriter wrote.
+    frame = pd.DataFrame.from_records(rows, columns=fieldnames)
+    with path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        frame.to_csv(f, index=False, lineterminator="\r\n")
+
+
+def write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
 def to_float(value: Any, default: float = 0.0) -> float:
@@ -35,36 +66,25 @@ def to_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-def sample_evenly(rows: list[dict[str, str]], n: int) -> list[dict[str, str]]:
+def sample_evenly(group: pd.DataFrame, n: int, key: str = "_key") -> pd.DataFrame:
+    """
+    `n` rows spread evenly over `group` (already in rank order), first and last included,
+    unique by `key`. When duplicate keys leave it short, it is topped up with the next unseen
+    rows in rank order.
+    """
     if n <= 0:
-        return []
-    if len(rows) <= n:
-        return rows
+        return group.iloc[:0]
+    if len(group) <= n:
+        return group
     if n == 1:
-        return [rows[0]]
-    out: list[dict[str, str]] = []
-    last_idx = len(rows) - 1
-    for i in range(n):
-        idx = round(i * last_idx / (n - 1))
-        out.append(rows[idx])
-    seen = set()
-    dedup: list[dict[str, str]] = []
-    for row in out:
-        key = str(row.get("event_id") or "")
-        if key in seen:
-            continue
-        seen.add(key)
-        dedup.append(row)
-    if len(dedup) < n:
-        for row in rows:
-            key = str(row.get("event_id") or "")
-            if key in seen:
-                continue
-            dedup.append(row)
-            seen.add(key)
-            if len(dedup) >= n:
-                break
-    return dedup
+        return group.iloc[:1]
+    # i * last / (n - 1) in float64 then round-half-even, i.e. Python's round(i * last / (n - 1)).
+    idx = np.round(np.arange(n) * (len(group) - 1) / (n - 1)).astype(np.int64)
+    chosen = group.iloc[idx].drop_duplicates(key)
+    if len(chosen) < n:
+        rest = group[~group[key].isin(chosen[key])].drop_duplicates(key)
+        chosen = pd.concat([chosen, rest.head(n - len(chosen))])
+    return chosen
 
 
 def main() -> None:
@@ -79,53 +99,62 @@ def main() -> None:
     args = parser.parse_args()
 
     events_path = Path(args.events)
-    rows = read_csv(events_path)
-    if not rows:
+    df = read_csv_df(events_path)
+    if df.empty:
         raise SystemExit(f"No se encontro dataset de eventos: {events_path}")
 
-    by_class: dict[str, list[dict[str, str]]] = {}
-    for row in rows:
-        label = str(row.get("likely_source") or "unknown")
-        by_class.setdefault(label, []).append(row)
-    for label in list(by_class.keys()):
-        by_class[label] = sorted(by_class[label], key=lambda r: to_float(r.get("event_score")), reverse=True)
+    labels = text_column(df, "likely_source", "unknown")
+    ranked = pd.DataFrame(
+        {
+            "_label": labels,
+            "_size": labels.map(labels.value_counts()),
+            "_score": numeric_column(df, "event_score"),
+            "_key": text_column(df, "event_id"),
+            "_row": np.arange(len(df)),
+        },
+        index=df.index,
+    )
+    # Classes by (-size, label); rows within a class by score desc, ties in file order.
+    ranked = ranked.sort_values(
+        ["_size", "_label", "_score", "_row"], ascending=[False, True, False, True], kind="stable"
+    )
 
-    sampled: list[dict[str, Any]] = []
     class_counts: dict[str, int] = {}
-    sample_id = 1
-    for label, class_rows in sorted(by_class.items(), key=lambda kv: (-len(kv[1]), kv[0])):
-        chosen = sample_evenly(class_rows, args.per_class)
-        class_counts[label] = len(chosen)
-        for row in chosen:
-            sampled.append(
-                {
-                    "sample_id": f"S{sample_id:04d}",
-                    "event_id": row.get("event_id") or "",
-                    "likely_source_model": label,
-                    "confidence_model": row.get("confidence") or "",
-                    "event_score": row.get("event_score") or "",
-                    "coordination_index": row.get("coordination_index") or "",
-                    "repeat_count": row.get("repeat_count") or "",
-                    "unique_authors": row.get("unique_authors") or "",
-                    "unique_submolts": row.get("unique_submolts") or "",
-                    "first_created_at": row.get("first_created_at") or "",
-                    "last_created_at": row.get("last_created_at") or "",
-                    "sample_excerpt": row.get("sample_excerpt") or "",
-                    "gold_label": "",
-                    "gold_confidence": "",
-                    "annotator_notes": "",
-                }
-            )
-            sample_id += 1
-
-    sampled = sorted(
-        sampled,
-        key=lambda r: (
-            str(r.get("likely_source_model") or ""),
-            -to_float(r.get("event_score")),
-            str(r.get("event_id") or ""),
-        ),
+    picks: list[pd.DataFrame] = []
+    for label, group in ranked.groupby("_label", sort=False):
+        chosen = sample_evenly(group, args.per_class)
+        class_counts[str(label)] = len(chosen)
+        picks.append(chosen)
+    chosen = pd.concat(picks) if picks else ranked.iloc[:0]
+
+    rows = df.loc[chosen.index]
+    sampled_df = pd.DataFrame(
+        {
+            "sample_id": np.char.add("S", np.char.zfill(np.arange(1, len(chosen) + 1).astype(str), 4)),
+            "event_id": chosen["_key"].to_numpy(),
+            "likely_source_model": chosen["_label"].to_numpy(),
+            "_score": chosen["_score"].to_numpy(),
+        }
+    )
+    for out_col, in_col in (
+        ("confidence_model", "confidence"),
+        ("event_score", "event_score"),
+        ("coordination_index", "coordination_index"),
+        ("repeat_count", "repeat_count"),
+        ("unique_authors", "unique_authors"),
+        ("unique_submolts", "unique_submolts"),
+        ("first_created_at", "first_created_at"),
+        ("last_created_at", "last_created_at"),
+        ("sample_excerpt", "sample_excerpt"),
+    ):
+        sampled_df[out_col] = text_column(rows, in_col).to_numpy()
+    for col in ("gold_label", "gold_confidence", "annotator_notes"):
+        sampled_df[col] = ""
+    sampled_df = sampled_df.sort_values(
+        ["likely_source_model", "_score", "event_id"], ascending=[True, False, True], kind="stable"
     )
+    sampled: list[dict[str, Any]] = sampled_df.drop(columns="_score").to_dict("records")
+
     write_csv(
         Path(args.out_csv),
         sampled,
@@ -150,10 +179,10 @@ def main() -> None:
 
     summary = {
         "generated_at": datetime.now(UTC).isoformat(),
-        "inputs": {"events_path": str(events_path), "events_total": len(rows)},
+        "inputs": {"events_path": str(events_path), "events_total": len(df)},
         "sampling": {
             "per_class_target": args.per_class,
-            "classes_present": dict(sorted(Counter(str(r.get("likely_source") or "unknown") for r in rows).items())),
+            "classes_present": {str(k): int(v) for k, v in labels.value_counts().sort_index().items()},
             "classes_sampled": class_counts,
             "sample_size_total": len(sampled),
         },
@@ -168,9 +197,7 @@ def main() -> None:
             "falso_positivo",
         ],
     }
-    out_json = Path(args.out_json)
-    out_json.parent.mkdir(parents=True, exist_ok=True)
-    out_json.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(Path(args.out_json), summary)
 
     guide_lines = [
         "# Human Intervention Annotation Guide",
@@ -210,7 +237,7 @@ def main() -> None:
     out_guide.parent.mkdir(parents=True, exist_ok=True)
     out_guide.write_text("\n".join(guide_lines).strip() + "\n", encoding="utf-8")
 
-    print(f"events_total={len(rows)} sample_total={len(sampled)}")
+    print(f"events_total={len(df)} sample_total={len(sampled)}")
     print(f"annotation_csv={args.out_csv}")
     print(f"annotation_json={args.out_json}")
     print(f"annotation_guide={args.out_guide}")
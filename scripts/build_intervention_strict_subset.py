@@ -2,27 +2,31 @@
 from __future__ import annotations
 
 import argparse
-import csv
-from collections import Counter
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import pandas as pd
 
-def read_csv(path: Path) -> list[dict[str, str]]:
+
+def read_csv_df(path: Path) -> pd.DataFrame:
+    """All columns as strings; empty cells stay "" (as with csv.DictReader)."""
     if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8", newline="") as f:
-        return list(csv.DictReader(f))
+        return pd.DataFrame()
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
 
 
-def write_csv(path: Path, rows: list[dict[str, Any]], fieldnames: list[str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({k: row.get(k) for k in fieldnames})
+def numeric_column(df: pd.DataFrame, name: str, default: float = 0.0) -> pd.Series:
+    """Vectorized to_float over a column; missing columns give `default`."""
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=float)
+    values = pd.to_numeric(df[name], errors="coerce")
+    # Cells pandas could not parse ("", "nan", "1_000", junk) go through to_float itself.
+    bad = values.isna()
+    if bad.any():
+        values[bad] = df.loc[bad, name].map(lambda v: to_float(v, default))
+    return values.astype(float)
 
 
 def to_float(value: Any, default: float = 0.0) -> float:
@@ -34,15 +38,6 @@ def to_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-def to_int(value: Any, default: int = 0) -> int:
-    try:
-        if value is None or value == "":
-            return default
-        return int(float(value))
-    except Exception:
-        return default
-
-
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Construye subset de alta confianza de intervencion humana probable."
@@ -60,65 +55,60 @@ def main() -> None:
     parser.add_argument("--top", type=int, default=0)
     args = parser.parse_args()
 
-    rows = read_csv(Path(args.events))
-    if not rows:
+    df = read_csv_df(Path(args.events))
+    if df.empty:
         raise SystemExit(f"No se encontro dataset de eventos: {args.events}")
 
-    strict_rows: list[dict[str, Any]] = []
-    for row in rows:
-        score = to_float(row.get("event_score"))
-        coord = to_float(row.get("coordination_index"))
-        repeat = to_int(row.get("repeat_count"))
-        promo_rate = to_float(row.get("promo_rate"))
-        cta_rate = to_float(row.get("cta_rate"))
-        human_refs = to_float(row.get("avg_human_refs"))
-        human_signal_rate = to_float(row.get("human_signal_rate"))
-
-        if score < args.min_event_score:
-            continue
-        if coord < args.min_coordination:
-            continue
-        if repeat < args.min_repeat:
-            continue
-
-        reasons: list[str] = []
-        if promo_rate >= args.min_promo_rate:
-            reasons.append("promo")
-        if cta_rate >= args.min_cta_rate:
-            reasons.append("cta")
-        if human_refs >= args.min_human_refs:
-            reasons.append("human_refs")
-        if human_signal_rate >= args.min_human_signal_rate:
-            reasons.append("human_signal")
-        if not reasons:
-            continue
-
-        out_row = dict(row)
-        out_row["strict_reason"] = "|".join(reasons)
-        strict_rows.append(out_row)
-
-    strict_rows.sort(key=lambda r: to_float(r.get("event_score")), reverse=True)
+    # Each numeric column is parsed once; filtering and the report below reuse these.
+    score = numeric_column(df, "event_score")
+    coordination = numeric_column(df, "coordination_index")
+    # int(float(x)) truncates toward zero; inf/nan cannot be converted and fall back to 0.
+    repeat = np.trunc(numeric_column(df, "repeat_count").replace([np.inf, -np.inf, np.nan], 0.0))
+    # Written as "not below" so a nan score/coordination passes, as the row-wise checks did.
+    core = ~(
+        (score < args.min_event_score)
+        | (coordination < args.min_coordination)
+        | (repeat < args.min_repeat)
+    )
+    reason_masks = {
+        "promo": numeric_column(df, "promo_rate") >= args.min_promo_rate,
+        "cta": numeric_column(df, "cta_rate") >= args.min_cta_rate,
+        "human_refs": numeric_column(df, "avg_human_refs") >= args.min_human_refs,
+        "human_signal": numeric_column(df, "human_signal_rate") >= args.min_human_signal_rate,
+    }
+    any_reason = np.logical_or.reduce(list(reason_masks.values()))
+    # "a|b|c" over the reasons that hold, in the order above.
+    strict_reason = pd.Series("", index=df.index, dtype=object)
+    for name, mask in reason_masks.items():
+        strict_reason = strict_reason.mask(mask, strict_reason.where(strict_reason == "", strict_reason + "|") + name)
+
+    keep = core & any_reason
+    strict = df[keep].assign(strict_reason=strict_reason[keep])
+    strict = strict.iloc[np.argsort(-score[keep].to_numpy(), kind="stable")]
     if args.top > 0:
-        strict_rows = strict_rows[: args.top]
+        strict = strict.head(args.top)
 
-    fieldnames = list(strict_rows[0].keys()) if strict_rows else [
-        "event_id",
-        "event_score",
-        "coordination_index",
-        "repeat_count",
-        "likely_source",
-        "strict_reason",
-    ]
-    write_csv(Path(args.out_csv), strict_rows, fieldnames)
+    out_csv = Path(args.out_csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    if strict.empty:
+        strict = pd.DataFrame(
+            columns=["event_id", "event_score", "coordination_index", "repeat_count", "likely_source", "strict_reason"]
+        )
+    # csv.DictWriter line endings, so the file reads the same as before.
+    with out_csv.open("w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        strict.to_csv(f, index=False, lineterminator="\r\n")
+    top_index = strict.index[:60]
+    strict_rows: list[dict[str, Any]] = strict.head(60).to_dict("records")
 
-    class_counts = Counter(str(r.get("likely_source") or "unknown") for r in strict_rows)
+    sources = strict["likely_source"] if "likely_source" in strict.columns else pd.Series("", index=strict.index)
+    class_counts = {str(k): int(v) for k, v in sources.fillna("").replace("", "unknown").value_counts().items()}
 
     lines: list[str] = []
     lines.append("# High-Confidence Human Intervention Events")
     lines.append("")
     lines.append(f"- generated_at: {datetime.now(UTC).isoformat()}")
-    lines.append(f"- events_input: {len(rows)}")
-    lines.append(f"- strict_events: {len(strict_rows)}")
+    lines.append(f"- events_input: {len(df)}")
+    lines.append(f"- strict_events: {len(strict)}")
     lines.append("")
     lines.append("## Criteria")
     lines.append("")
@@ -140,17 +130,19 @@ def main() -> None:
     lines.append("")
     lines.append("| event_id | class | score | coordination | repeat | strict_reason |")
     lines.append("|---|---|---:|---:|---:|---|")
-    for row in strict_rows[:60]:
+    for row, row_score, row_coord, row_repeat in zip(
+        strict_rows, score.reindex(top_index), coordination.reindex(top_index), repeat.reindex(top_index)
+    ):
         lines.append(
-            f"| {row.get('event_id','')} | {row.get('likely_source','')} | {to_float(row.get('event_score')):.4f} | "
-            f"{to_float(row.get('coordination_index')):.4f} | {to_int(row.get('repeat_count'))} | {row.get('strict_reason','')} |"
+            f"| {row.get('event_id','')} | {row.get('likely_source','')} | {row_score:.4f} | "
+            f"{row_coord:.4f} | {int(row_repeat)} | {row.get('strict_reason','')} |"
         )
 
     out_md = Path(args.out_md)
     out_md.parent.mkdir(parents=True, exist_ok=True)
     out_md.write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
 
-    print(f"events_input={len(rows)} strict_events={len(strict_rows)}")
+    print(f"events_input={len(df)} strict_events={len(strict)}")
     print(f"strict_csv={args.out_csv}")
     print(f"strict_md={args.out_md}")
 
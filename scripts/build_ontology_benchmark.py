@@ -2,12 +2,24 @@
 from __future__ import annotations
 
 import argparse
+import re
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import pyarrow.parquet as pq
+import pyarrow.dataset as ds
 from langdetect import detect, DetectorFactory, LangDetectException
 
+try:
+    import fasttext
+except Exception:  # pragma: no cover - optional dependency
+    fasttext = None
+
+# load_signals hands back private frames, so the per-file loop in main() edits them without
+# defensive copies; Copy-on-Write (always on from pandas 3) keeps that safe on pandas 2.x.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 
 ACT_KEYS = [
     "request",
@@ -35,8 +47,51 @@ ACT_KEY_TO_ES = {
 }
 
 
-def collapse_ws(text: str) -> str:
-    return " ".join((text or "").split())
+WS_RE = re.compile(r"\s+")
+
+
+def collapse_ws(text: pd.Series) -> pd.Series:
+    # Same as " ".join(t.split()) per row. The compiled pattern keeps Python's Unicode \s even on
+    # Arrow-backed string columns, whose own regex engine only treats ASCII as whitespace.
+    return text.fillna("").astype(str).str.replace(WS_RE, " ", regex=True).str.strip()
+
+
+def doc_full_text(frame: pd.DataFrame) -> pd.Series:
+    """Posts: "title\ntext" stripped; comments: text as is. One column-wise pass, no .loc writes."""
+    texts = frame["text"].fillna("")
+    post_mask = (frame["doc_type"] == "post").fillna(False).astype(bool)
+    return (frame["title"].fillna("") + "\n" + texts).str.strip().where(post_mask, texts)
+
+
+# Function words that (unaccented) mostly belong to one of en/es/pt; shared ones like "que",
+# "para", "de" or "a" are left out on purpose.
+ASCII_LANG_MARKERS = {
+    "en": ["the", "and", "is", "are", "was", "with", "this", "that", "you", "for", "have", "not", "it", "of", "to"],
+    "es": ["el", "los", "las", "del", "y", "es", "por", "con", "una", "pero", "muy", "esta", "este", "lo", "su"],
+    "pt": ["os", "das", "dos", "uma", "com", "nao", "mas", "muito", "voce", "isso", "do", "da", "em", "um", "ao"],
+}
+
+
+def ascii_lang_guess(texts: pd.Series, min_len: int = 20, min_hits: int = 3, margin: float = 3.0) -> pd.Series:
+    """
+    Cheap column-wise guess for pure-ASCII texts: count each language's marker words and keep the
+    winner only when it has `min_hits` hits and `margin` times the runner-up. Everything else
+    (non-ASCII, short or ambiguous) is None and left to the real detector.
+    """
+    lowered = texts.fillna("").astype(str).str.strip().str.lower()
+    eligible = lowered.str.fullmatch(r"[\x00-\x7f]*").fillna(False).astype(bool) & (lowered.str.len() >= min_len)
+    names = list(ASCII_LANG_MARKERS)
+    hits = np.column_stack(
+        [
+            lowered.str.count(r"\b(?:" + "|".join(words) + r")\b").fillna(0).to_numpy(dtype=np.int64)
+            for words in ASCII_LANG_MARKERS.values()
+        ]
+    )
+    ranked = np.sort(hits, axis=1)
+    best, second = ranked[:, -1], ranked[:, -2]
+    confident = eligible.to_numpy() & (best >= min_hits) & (best >= margin * second)
+    guess = np.array(names, dtype=object)[hits.argmax(axis=1)]
+    return pd.Series(np.where(confident, guess, None), index=texts.index, dtype=object)
 
 
 def detect_lang(text: str, min_len: int = 20) -> str | None:
@@ -49,10 +104,45 @@ def detect_lang(text: str, min_len: int = 20) -> str | None:
         return None
 
 
-def load_signals(path: Path, columns: list[str]) -> pd.DataFrame:
-    available = set(pq.ParquetFile(path).schema.names)
+def detect_langs(texts: list[str], model=None, min_len: int = 20) -> list[str | None]:
+    """
+    Language per text (None when shorter than `min_len`). With a fastText LID model
+    (e.g. lid.176.ftz) every eligible text goes through one batched `predict` call;
+    otherwise each text falls back to langdetect.
+    """
+    if model is None:
+        return [detect_lang(t, min_len=min_len) for t in texts]
+    out: list[str | None] = [None] * len(texts)
+    eligible = [i for i, t in enumerate(texts) if len((t or "").strip()) >= min_len]
+    if not eligible:
+        return out
+    # fastText predicts one line per input, so newlines must not reach it (collapse_ws removes them).
+    labels, _ = model.predict([texts[i].strip().replace("\n", " ") for i in eligible], k=1)
+    for i, label in zip(eligible, labels):
+        out[i] = label[0].replace("__label__", "") if len(label) else None
+    return out
+
+
+def load_lid_model(path: str):
+    if not path:
+        return None
+    if fasttext is None:
+        print("fasttext not installed; falling back to langdetect.")
+        return None
+    if not Path(path).exists():
+        print(f"LID model not found at {path}; falling back to langdetect.")
+        return None
+    return fasttext.load_model(path)
+
+
+def load_signals(path: Path, columns: list[str], min_tokens: int = 0) -> pd.DataFrame:
+    dataset = ds.dataset(path, format="parquet")
+    available = set(dataset.schema.names)
     cols = [c for c in columns if c in available]
-    df = pd.read_parquet(path, engine="pyarrow", columns=cols)
+    # Pushed into the scan: row groups whose token_count stats are all below the bar are skipped.
+    # Null counts read as 0, so they only pass when min_tokens <= 0 (i.e. no filter at all).
+    token_filter = ds.field("token_count") >= min_tokens if "token_count" in available and min_tokens > 0 else None
+    df = dataset.to_table(columns=cols, filter=token_filter).to_pandas(types_mapper=pd.ArrowDtype)
     # Ensure expected columns exist even if future schema changes.
     for col in ["doc_id", "doc_type", "created_at", "lang", "submolt", "title", "text"]:
         if col not in df.columns:
@@ -73,6 +163,16 @@ def main() -> None:
     parser.add_argument("--excerpt-chars", type=int, default=520)
     parser.add_argument("--pool-size", type=int, default=24000)
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--lid-model",
+        default="",
+        help="Optional fastText language-ID model (lid.176.ftz/bin) for batched detection; langdetect otherwise.",
+    )
+    parser.add_argument(
+        "--ascii-lang-prefilter",
+        action="store_true",
+        help="Label clear-cut ASCII en/es/pt texts by function-word counts and only send the rest to the detector.",
+    )
     args = parser.parse_args()
 
     DetectorFactory.seed = int(args.seed)
@@ -95,30 +195,37 @@ def main() -> None:
     ]
     cols = list(dict.fromkeys(base_cols + act_cols))
 
-    df_posts = load_signals(posts_path, columns=cols) if posts_path.exists() else pd.DataFrame()
-    df_comments = load_signals(comments_path, columns=cols) if comments_path.exists() else pd.DataFrame()
+    df_posts = load_signals(posts_path, columns=cols, min_tokens=args.min_tokens) if posts_path.exists() else pd.DataFrame()
+    df_comments = (
+        load_signals(comments_path, columns=cols, min_tokens=args.min_tokens) if comments_path.exists() else pd.DataFrame()
+    )
 
     rows = []
     for df in [df_posts, df_comments]:
         if df.empty:
             continue
-        df = df.copy()
-        if "token_count" in df.columns:
-            df = df[df["token_count"].fillna(0) >= args.min_tokens]
         # If the lang column exists but is empty/null (common when signals were generated with --skip-lang-detect),
         # we'll detect language on a sampled pool later.
         if "lang" in df.columns and df["lang"].notna().any():
             df = df[df["lang"].notna() & (df["lang"].astype(str).str.len() >= 2)]
 
-        for c in act_cols:
-            if c not in df.columns:
-                df[c] = 0
-        acts = df[act_cols].fillna(0).astype(int)
-        max_score = acts.max(axis=1).astype(int)
-        pred_key = acts.idxmax(axis=1).str.replace("act_", "", regex=False)
-        df["pred_act_key"] = pred_key.where(max_score > 0, "unknown")
+        df = df.assign(**{c: 0 for c in act_cols if c not in df.columns})
+        acts = df[act_cols].fillna(0).to_numpy(dtype=np.int64)
+        # argmax takes the first maximal column on ties, like idxmax; act_cols follow ACT_KEYS order.
+        best = acts.argmax(axis=1)
+        max_score = acts[np.arange(len(acts)), best]
+        df["pred_act_key"] = np.where(max_score > 0, np.array(ACT_KEYS, dtype=object)[best], "unknown")
         df["pred_act_score"] = max_score
-        df["pred_act_es"] = df["pred_act_key"].map(ACT_KEY_TO_ES).fillna(df["pred_act_key"])
+        # Categorical relabel: one code lookup per row instead of a dict .map plus a full fillna copy.
+        pred_act_es = pd.Series(
+            pd.Categorical(df["pred_act_key"], categories=list(ACT_KEY_TO_ES)).rename_categories(
+                list(ACT_KEY_TO_ES.values())
+            ),
+            index=df.index,
+        )
+        if pred_act_es.isna().any():  # keys without a translation keep their own name
+            pred_act_es = pred_act_es.astype(object).fillna(df["pred_act_key"])
+        df["pred_act_es"] = pred_act_es
 
         keep_cols = [
             "doc_id",
@@ -132,9 +239,7 @@ def main() -> None:
             "pred_act_es",
             "pred_act_score",
         ]
-        for col in keep_cols:
-            if col not in df.columns:
-                df[col] = None
+        df = df.assign(**{col: None for col in keep_cols if col not in df.columns})
         rows.append(df[keep_cols])
 
     if not rows:
@@ -150,17 +255,13 @@ def main() -> None:
 
     if "lang" not in pool.columns or not pool["lang"].notna().any():
         # Detect language on the pool using the sampled excerpt (fast, reproducible enough).
-        post_mask = pool["doc_type"] == "post"
-        full_text = pd.Series([""] * len(pool))
-        if post_mask.any():
-            full_text.loc[post_mask] = (
-                pool.loc[post_mask, "title"].fillna("").astype(str)
-                + "\n"
-                + pool.loc[post_mask, "text"].fillna("").astype(str)
-            ).str.strip()
-        if (~post_mask).any():
-            full_text.loc[~post_mask] = pool.loc[~post_mask, "text"].fillna("").astype(str)
-        pool["lang"] = full_text.map(collapse_ws).map(detect_lang)
+        texts = collapse_ws(doc_full_text(pool))
+        lang = pd.Series(None, index=pool.index, dtype=object)
+        if args.ascii_lang_prefilter:
+            lang = ascii_lang_guess(texts)
+        pending = lang.isna().to_numpy()
+        lang[pending] = detect_langs(texts[pending].tolist(), model=load_lid_model(args.lid_model))
+        pool["lang"] = lang
 
     sampled = []
     for lang in langs:
@@ -175,19 +276,9 @@ def main() -> None:
 
     out_df = pd.concat(sampled, ignore_index=True).drop_duplicates(subset=["doc_id"])
     out_df = out_df.sample(frac=1.0, random_state=int(args.seed)).reset_index(drop=True)
-    out_df.insert(0, "sample_id", [f"S{idx+1:04d}" for idx in range(len(out_df))])
+    out_df.insert(0, "sample_id", np.char.add("S", np.char.zfill(np.arange(1, len(out_df) + 1).astype(str), 4)))
     # Build excerpt only for sampled rows to keep generation fast.
-    post_mask = out_df["doc_type"] == "post"
-    full_text = pd.Series([""] * len(out_df))
-    if post_mask.any():
-        full_text.loc[post_mask] = (
-            out_df.loc[post_mask, "title"].fillna("").astype(str)
-            + "\n"
-            + out_df.loc[post_mask, "text"].fillna("").astype(str)
-        ).str.strip()
-    if (~post_mask).any():
-        full_text.loc[~post_mask] = out_df.loc[~post_mask, "text"].fillna("").astype(str)
-    out_df["text_excerpt"] = full_text.map(collapse_ws).str.slice(0, int(args.excerpt_chars))
+    out_df["text_excerpt"] = collapse_ws(doc_full_text(out_df)).str.slice(0, int(args.excerpt_chars))
     out_df = out_df.drop(columns=["title", "text"], errors="ignore")
     out_df["label_act_es"] = ""
     out_df["label_notes"] = ""
@@ -4,19 +4,75 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 
-def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
+try:
+    import ahocorasick
+except Exception:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+
+def _loads_line(line: bytes) -> Any:
+    """Parse one JSONL line with orjson when available; lines it rejects get a second try with json."""
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
+def _appears_verbatim(doc_id: str) -> bool:
+    # Printable ASCII other than '"', '\\' and '/' is never escaped by JSON writers, so the id
+    # shows up in the raw line exactly as it is.
+    return all(" " <= ch <= "~" and ch not in '"\\/' for ch in doc_id)
+
+
+def build_id_automaton(ids: Iterable[str]):
+    """
+    Aho-Corasick automaton over the wanted ids, used as a raw-line prefilter. Returns None (no
+    prefiltering) when pyahocorasick is missing, there is nothing to look for, or any id could be
+    JSON-escaped in the dump (non-ASCII, control characters, '"', '\\' or '/'), since a raw
+    substring match would then miss records that do carry it.
+    """
+    if ahocorasick is None:
+        return None
+    ids = list(ids)
+    if not all(_appears_verbatim(doc_id) for doc_id in ids):
+        return None
+    automaton = ahocorasick.Automaton()
+    for doc_id in ids:
+        automaton.add_word(doc_id, doc_id)
+    if not len(automaton):
+        return None
+    automaton.make_automaton()
+    return automaton
+
+
+def iter_jsonl(path: Path, prefilter=None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield dict records from a JSONL file. With a `prefilter` automaton, lines that mention none of
+    its ids are skipped before parsing; callers still check the parsed id.
+    """
+    # Raw bytes go to the parser. The prefilter needs str (pyahocorasick's unicode build), so the
+    # line gets a byte-for-byte latin-1 decode for the scan; ids are ASCII, so matches are exact.
+    with path.open("rb", buffering=1 << 20) as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
+            if prefilter is not None and next(prefilter.iter(line.decode("latin-1")), None) is None:
+                continue
             try:
-                obj = json.loads(line)
-            except json.JSONDecodeError:
+                obj = _loads_line(line)
+            except ValueError:
                 continue
             if isinstance(obj, dict):
                 yield obj
@@ -58,51 +114,115 @@ def read_csv_typed_ids(path: Path, id_field: str, type_field: str) -> Set[Tuple[
     return out
 
 
+def doc_text(obj: Dict[str, Any], doc_type: str) -> str:
+    if doc_type == "post":
+        title = obj.get("title") or ""
+        content = obj.get("content") or obj.get("body") or ""
+        return f"{title}\n{content}".strip()
+    content = obj.get("content") or obj.get("body") or ""
+    return str(content).strip()
+
+
+def scan_docs(path: Path, doc_type: str, wanted: Set[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (doc_id, text) for every wanted id found in one JSONL dump, stopping once all are found."""
+    remaining = set(wanted)
+    if not path.exists() or not remaining:
+        return
+    for obj in iter_jsonl(path, build_id_automaton(remaining)):
+        doc_id = safe_get_id(obj)
+        if not doc_id or doc_id not in remaining:
+            continue
+        yield doc_id, doc_text(obj, doc_type)
+        remaining.discard(doc_id)
+        if not remaining:
+            break
+
+
+def collect_docs(path: Path, doc_type: str, wanted: Set[str]) -> List[Tuple[str, str]]:
+    """scan_docs as a list, for the worker processes of the parallel mode."""
+    return list(scan_docs(path, doc_type, wanted))
+
+
 def build_lookup(
     posts_path: Path,
     comments_path: Path,
     typed_ids: Set[Tuple[str, str]],
     unknown_ids: Set[str],
-) -> Dict[str, Dict[str, Any]]:
-    # Extract only the needed docs from the large JSONL dumps.
+    workers: int = 1,
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    Extract only the needed docs from the large JSONL dumps, yielding (doc_id, doc_type, text):
+    posts first, then comments. Untyped ids resolve to the post when both dumps have them; an id
+    requested as a comment resolves to the comment. Each doc_id is yielded once.
+
+    With workers=1 (default) the scans run one after the other and stream: each doc is yielded
+    as it is found, and the comments scan only looks for what the posts scan left unresolved.
+    With workers > 1 the two dumps are scanned concurrently in separate processes and collected
+    in memory. The comments scan then cannot drop untyped ids already found among posts, so it
+    reads on until the end of the dump when those ids are posts only; that is usually slower.
+    """
     need_posts: Set[str] = {doc_id for doc_id, typ in typed_ids if typ == "post"}
     need_comments: Set[str] = {doc_id for doc_id, typ in typed_ids if typ == "comment"}
     unknown: Set[str] = set(unknown_ids)
 
-    docs: Dict[str, Dict[str, Any]] = {}
+    comments: Optional[Iterable[Tuple[str, str]]] = None
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            posts_future = executor.submit(collect_docs, posts_path, "post", need_posts | unknown)
+            comments_future = executor.submit(collect_docs, comments_path, "comment", need_comments | unknown)
+            posts: Iterable[Tuple[str, str]] = posts_future.result()
+            comments = comments_future.result()
+    else:
+        posts = scan_docs(posts_path, "post", need_posts | unknown)
 
-    if posts_path.exists() and (need_posts or unknown):
-        for post in iter_jsonl(posts_path):
-            pid = safe_get_id(post)
-            if not pid:
-                continue
-            if pid not in need_posts and pid not in unknown:
-                continue
-            title = post.get("title") or ""
-            content = post.get("content") or post.get("body") or ""
-            text = f"{title}\n{content}".strip()
-            docs[pid] = {"doc_type": "post", "text": text}
-            need_posts.discard(pid)
-            unknown.discard(pid)
-            if not need_posts and not unknown:
-                break
-
-    if comments_path.exists() and (need_comments or unknown):
-        for comment in iter_jsonl(comments_path):
-            cid = safe_get_id(comment)
-            if not cid:
-                continue
-            if cid not in need_comments and cid not in unknown:
-                continue
-            content = comment.get("content") or comment.get("body") or ""
-            text = str(content).strip()
-            docs[cid] = {"doc_type": "comment", "text": text}
-            need_comments.discard(cid)
-            unknown.discard(cid)
-            if not need_comments and not unknown:
-                break
+    found_posts: Set[str] = set()
+    # Posts whose id is also requested as a comment (a small set): written at the end, and only
+    # if no comment with that id turns up, so each key appears once and the comment wins.
+    held_posts: Dict[str, str] = {}
+    for pid, text in posts:
+        found_posts.add(pid)
+        if pid in need_comments:
+            held_posts[pid] = text
+        else:
+            yield pid, "post", text
+    if comments is None:
+        # Sequential: the posts scan is done, so untyped ids it resolved are not looked for again.
+        comments = scan_docs(comments_path, "comment", need_comments | (unknown - found_posts))
+    for cid, text in comments:
+        if cid in need_comments or cid not in found_posts:
+            held_posts.pop(cid, None)
+            yield cid, "comment", text
+    for pid, text in held_posts.items():
+        yield pid, "post", text
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
 
-    return docs
+
+def write_lookup(
+    out_path: Path,
+    docs: Iterable[Tuple[str, str, str]],
+    generated_from: Dict[str, str],
+    counts: Dict[str, int],
+) -> int:
+    """
+    Stream {"generated_from", "docs", "counts"} to `out_path`, writing each doc as it arrives.
+    `docs` must not repeat a doc_id (build_lookup guarantees this). `counts` is completed with
+    docs_written and goes last since it is only known at the end.
+    """
+    written = 0
+    with out_path.open("wb", buffering=1 << 20) as f:
+        f.write(b'{"generated_from":' + dumps_bytes(generated_from) + b',"docs":{')
+        for doc_id, doc_type, text in docs:
+            if written:
+                f.write(b",")
+            f.write(dumps_bytes(doc_id) + b":" + dumps_bytes({"doc_type": doc_type, "text": text}))
+            written += 1
+        f.write(b'},"counts":' + dumps_bytes({**counts, "docs_written": written}) + b"}")
+    return written
 
 
 def main() -> None:
@@ -113,6 +233,12 @@ def main() -> None:
     parser.add_argument("--comments", default="data/raw/api_fetch/comments.jsonl")
     parser.add_argument("--derived", default="data/derived")
     parser.add_argument("--out", default="data/derived/public_doc_lookup.json")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="1 scans posts then comments, streaming; 2 scans them in parallel processes (holds all docs in memory).",
+    )
     args = parser.parse_args()
 
     derived = Path(args.derived)
@@ -135,21 +261,13 @@ def main() -> None:
     typed_ids |= {(pid, "post") for pid in read_csv_ids(derived / "embeddings_post_comment" / "public_embeddings_post_comment_pairs_top.csv", ("post_id",))}
     typed_ids |= {(cid, "comment") for cid in read_csv_ids(derived / "embeddings_post_comment" / "public_embeddings_post_comment_pairs_top.csv", ("comment_id",))}
 
-    docs = build_lookup(posts_path, comments_path, typed_ids, unknown_ids)
-    payload = {
-        "generated_from": {
-            "posts": str(posts_path),
-            "comments": str(comments_path),
-        },
-        "counts": {
-            "typed_ids": len(typed_ids),
-            "unknown_ids": len(unknown_ids),
-            "docs_written": len(docs),
-        },
-        "docs": docs,
-    }
-    out_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-    print(f"Wrote {len(docs)} docs to {out_path}")
+    docs_written = write_lookup(
+        out_path,
+        build_lookup(posts_path, comments_path, typed_ids, unknown_ids, workers=args.workers),
+        generated_from={"posts": str(posts_path), "comments": str(comments_path)},
+        counts={"typed_ids": len(typed_ids), "unknown_ids": len(unknown_ids)},
+    )
+    print(f"Wrote {docs_written} docs to {out_path}")
 
 
 if __name__ == "__main__":
@@ -3,30 +3,143 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Iterable
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 
-def iter_jsonl(path: Path) -> Iterable[dict]:
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _loads_line(line: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
+def iter_jsonl(path: Path, chunk_size: int = 1 << 20) -> Iterable[dict]:
     if not path.exists():
         return []
-    with path.open("r", encoding="utf-8") as f:
+    # Fixed-size binary reads split on b"\n" by hand: no per-line readline/decode. A line that
+    # straddles chunks is carried over as a list of pieces (joined once), never by repeated +=.
+    # Both parsers skip surrounding whitespace (incl. "\r"); blank or broken lines are dropped.
+    pending: list[bytes] = []
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            last_nl = chunk.rfind(b"\n")
+            if last_nl < 0:
+                pending.append(chunk)
+                continue
+            lines = chunk[:last_nl].split(b"\n")
+            if pending:
+                pending.append(lines[0])
+                lines[0] = b"".join(pending)
+                pending = []
+            tail = chunk[last_nl + 1 :]
+            if tail:
+                pending.append(tail)
+            for line in lines:
+                try:
+                    yield _loads_line(line)
+                except ValueError:
+                    continue
+    if pending:
+        try:
+            yield _loads_line(b"".join(pending))
+        except ValueError:
+            pass
+
+
+def build_or_load_index(jsonl_path: Path, index_dir: Path) -> dict[str, tuple[int, int]]:
+    """
+    id -> (byte_offset, length) of that record's line in `jsonl_path`, cached as JSON under
+    `index_dir`. The cache is rebuilt (one full scan) whenever the JSONL size or mtime changes.
+    A repeated id maps to its last line. Within a process the loaded index is also kept in memory,
+    so both builders share one copy of the posts index (treat the returned dict as read-only).
+    """
+    stat = jsonl_path.stat()
+    return _load_index(jsonl_path, index_dir, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _load_index(jsonl_path: Path, index_dir: Path, size: int, mtime_ns: int) -> dict[str, tuple[int, int]]:
+    index_path = index_dir / f"{jsonl_path.name}.offsets.json"
+    if index_path.exists():
+        try:
+            cached = json.loads(index_path.read_text(encoding="utf-8"))
+            if cached.get("size") == size and cached.get("mtime_ns") == mtime_ns:
+                return {k: (int(v[0]), int(v[1])) for k, v in cached["offsets"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    offsets: dict[str, tuple[int, int]] = {}
+    pos = 0
+    with jsonl_path.open("rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            start, pos = pos, pos + len(line)
+            if not line.strip():
+                continue
+            try:
+                obj = _loads_line(line)
+            except ValueError:
                 continue
+            doc_id = obj.get("id") if isinstance(obj, dict) else None
+            if isinstance(doc_id, str):
+                offsets[doc_id] = (start, len(line))
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"source": str(jsonl_path), "size": size, "mtime_ns": mtime_ns, "offsets": offsets}),
+        encoding="utf-8",
+    )
+    tmp_path.replace(index_path)
+    return offsets
+
+
+def iter_wanted_records(path: Path, wanted: set[str], index_dir: Path | None) -> Iterable[dict]:
+    """
+    Records of `path` whose "id" is in `wanted`. With an `index_dir`, only those lines are read
+    (seek + read through the offset index, in file order); without one the whole file is scanned.
+    """
+    if index_dir is None or not path.exists():
+        yield from iter_jsonl(path)
+        return
+    offsets = build_or_load_index(path, index_dir)
+    spans = sorted(offsets[doc_id] for doc_id in wanted if doc_id in offsets)
+    with path.open("rb") as f:
+        for start, length in spans:
+            f.seek(start)
             try:
-                yield json.loads(line)
-            except json.JSONDecodeError:
+                yield _loads_line(f.read(length))
+            except ValueError:
                 continue
 
 
 def compact_text(text: str) -> str:
     # Keep it simple: collapse whitespace and keep stable Unicode for UI excerpts.
-    return re.sub(r"\s+", " ", (text or "")).strip()
+    # str.split() uses the same Unicode whitespace set as regex \s, without the regex engine.
+    return " ".join((text or "").split())
 
 
 def excerpt(text: str, max_len: int = 220) -> str:
@@ -36,48 +149,75 @@ def excerpt(text: str, max_len: int = 220) -> str:
     return t[: max_len - 1] + "…"
 
 
-def alnum_count(text: str) -> int:
-    return sum(1 for c in (text or "") if c.isalnum())
+def norm_text(text: str) -> str:
+    # Lowercased, whitespace-collapsed form used to drop pairs whose two sides read the same.
+    return " ".join((text or "").lower().split())
+
+
+def text_digest(norm: str) -> int:
+    # 64-bit digest of a normalized excerpt; text-pair dedup keys on two ints instead of two strings.
+    return int.from_bytes(hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest(), "big")
 
 
-TEMPLATE_RE = re.compile(
-    r"mbc-20|mbc20\.xyz|\"p\"\s*:\s*\"mbc-20\"|\"op\"\s*:\s*\"(mint|link|transfer)\"",
-    flags=re.IGNORECASE,
-)
+def alnum_at_least(text: str, n: int) -> bool:
+    # True once `text` has n alphanumeric chars. Each pass counts (in C, via map) only as many
+    # chars as are still missing, so the scan stops where the n-th alnum char is found.
+    text = text or ""
+    count = 0
+    pos = 0
+    while count < n and pos < len(text):
+        need = n - count
+        count += sum(map(str.isalnum, text[pos : pos + need]))
+        pos += need
+    return count >= n
 
 
-def looks_like_template(text: str) -> bool:
-    return bool(TEMPLATE_RE.search(text or ""))
+# Matched against already-lowercased text (see norm_text), so no IGNORECASE case-folding per char.
+TEMPLATE_RE = re.compile(r"mbc-20|mbc20\.xyz|\"p\"\s*:\s*\"mbc-20\"|\"op\"\s*:\s*\"(?:mint|link|transfer)\"")
+
+
+def looks_like_template(lowered: str) -> bool:
+    return bool(TEMPLATE_RE.search(lowered or ""))
 
 
 def write_csv(path: Path, rows: list[dict], fieldnames: list[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow({k: r.get(k) for k in fieldnames})
+        w = csv.writer(f)
+        w.writerow(fieldnames)
+        w.writerows([r.get(k) for k in fieldnames] for r in rows)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PostInfo:
     submolt: str
     created_at: str
     lang: str
     excerpt: str
+    norm_excerpt: str
+    text_digest: int
+    # Excerpt screens, evaluated once per doc rather than once per candidate pair.
+    alnum_ok: bool
+    is_template: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CommentInfo:
     created_at: str
     excerpt: str
+    norm_excerpt: str
+    text_digest: int
+    alnum_ok: bool
+    is_template: bool
 
 
-def load_posts_info(posts_path: Path, wanted: set[str], max_excerpt: int) -> dict[str, PostInfo]:
+def load_posts_info(
+    posts_path: Path, wanted: set[str], max_excerpt: int, min_alnum: int, index_dir: Path | None = None
+) -> dict[str, PostInfo]:
     out: dict[str, PostInfo] = {}
     if not wanted:
         return out
-    for post in iter_jsonl(posts_path):
+    for post in iter_wanted_records(posts_path, wanted, index_dir):
         pid = post.get("id")
         if not isinstance(pid, str) or pid not in wanted:
             continue
@@ -90,33 +230,185 @@ def load_posts_info(posts_path: Path, wanted: set[str], max_excerpt: int) -> dic
         created_at = str(post.get("created_at") or "")
         # Prefer language already computed in embeddings pipeline if present, but fall back gracefully.
         lang = str(post.get("lang") or "unknown")
+        ex = excerpt(text, max_excerpt)
+        norm_ex = norm_text(ex)
         out[pid] = PostInfo(
-            submolt=str(submolt or "unknown"),
+            # Few distinct submolts/langs: interned, so every post shares one object per value and
+            # the submolt comparisons in is_cross mostly resolve on identity.
+            submolt=sys.intern(str(submolt or "unknown")),
             created_at=created_at,
-            lang=lang or "unknown",
-            excerpt=excerpt(text, max_excerpt),
+            lang=sys.intern(lang or "unknown"),
+            excerpt=ex,
+            norm_excerpt=norm_ex,
+            text_digest=text_digest(norm_ex),
+            alnum_ok=alnum_at_least(ex, min_alnum),
+            is_template=looks_like_template(norm_ex),
         )
         if len(out) >= len(wanted):
             break
     return out
 
 
-def load_comments_info(comments_path: Path, wanted: set[str], max_excerpt: int) -> dict[str, CommentInfo]:
+def load_comments_info(
+    comments_path: Path, wanted: set[str], max_excerpt: int, min_alnum: int, index_dir: Path | None = None
+) -> dict[str, CommentInfo]:
     out: dict[str, CommentInfo] = {}
     if not wanted:
         return out
-    for c in iter_jsonl(comments_path):
+    for c in iter_wanted_records(comments_path, wanted, index_dir):
         cid = c.get("id")
         if not isinstance(cid, str) or cid not in wanted:
             continue
         text = str(c.get("content") or "").strip()
         created_at = str(c.get("created_at") or "")
-        out[cid] = CommentInfo(created_at=created_at, excerpt=excerpt(text, max_excerpt))
+        ex = excerpt(text, max_excerpt)
+        norm_ex = norm_text(ex)
+        out[cid] = CommentInfo(
+            created_at=created_at,
+            excerpt=ex,
+            norm_excerpt=norm_ex,
+            text_digest=text_digest(norm_ex),
+            alnum_ok=alnum_at_least(ex, min_alnum),
+            is_template=looks_like_template(norm_ex),
+        )
         if len(out) >= len(wanted):
             break
     return out
 
 
+def _scored_rows_stdlib(
+    matches_path: Path, fields: tuple[str, ...], min_score: float, max_score: float | None
+) -> Iterable[tuple[int, float, tuple[str, ...]]]:
+    """
+    `(seen, score, cells)` for every row whose score lies in [min_score, max_score], where `fields`
+    is `(score_key, *cell_fields)`, `seen` is the row's 1-based position among non-blank rows and
+    `cells` are its `cell_fields` values ("" when the column or cell is missing).
+    """
+    seen = 0
+    # 1 MiB read buffer: fewer read syscalls for the multi-hundred-MB match files.
+    with matches_path.open("r", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Positional access instead of a dict per row. Absent columns point one past the header and
+        # rows are padded with "" up to that slot, which reads the same as DictReader's missing values.
+        i_score, *i_cells = (header.index(name) if name in header else len(header) for name in fields)
+        width = max(i_score, *i_cells) + 1
+        # One C-level call picks every wanted cell out of a row (fields always has 3+ cells, so
+        # itemgetter returns a tuple).
+        project = itemgetter(*i_cells)
+        for row in reader:
+            if not row:
+                continue
+            seen += 1
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+            try:
+                score = float(row[i_score] or 0.0)
+            except Exception:
+                continue
+            if score < min_score:
+                continue
+            if max_score is not None and score > max_score:
+                continue
+            yield seen, score, project(row)
+
+
+def _parse_score(raw: str) -> float | None:
+    try:
+        return float(raw or 0.0)
+    except Exception:
+        return None
+
+
+def _pair_rows_mask(batch: pa.RecordBatch, a_key: str, b_key: str, lang_key: str, drop_lang_unknown: bool) -> np.ndarray:
+    """Vectorized id/lang checks of _top_pairs: False where that loop would skip the row."""
+    names = batch.schema.names
+    if a_key not in names or b_key not in names:
+        return np.zeros(batch.num_rows, dtype=bool)
+    a = batch.column(a_key)
+    b = batch.column(b_key)
+    mask = pc.and_(pc.and_(pc.not_equal(a, ""), pc.not_equal(b, "")), pc.not_equal(a, b))
+    mask = mask.to_numpy(zero_copy_only=False)
+    if drop_lang_unknown:
+        if lang_key not in names:
+            return np.zeros(batch.num_rows, dtype=bool)
+        # Few distinct langs: strip() each dictionary value once, with the same rule as the loop.
+        enc = batch.column(lang_key).dictionary_encode()
+        unknown = np.array([(v.strip() or "unknown") == "unknown" for v in enc.dictionary.to_pylist()], dtype=bool)
+        mask &= ~unknown[enc.indices.to_numpy(zero_copy_only=False)]
+    return mask
+
+
+def _scored_rows_arrow(
+    matches_path: Path,
+    fields: tuple[str, ...],
+    min_score: float,
+    max_score: float | None,
+    *,
+    top_k: int = 0,
+    drop_lang_unknown: bool = False,
+) -> Iterable[tuple[int, float, tuple[str, ...]]]:
+    """
+    Same rows as _scored_rows_stdlib, but the file is parsed in Arrow record batches and the score
+    window is applied with vectorized compares, so only rows that pass reach Python objects.
+    Raises pa.ArrowInvalid on layouts csv.reader tolerates and Arrow does not (ragged rows,
+    duplicate header names); the caller then rescans with the stdlib reader.
+
+    With `top_k > 0` (the caller's heap size), a batch also drops rows scoring strictly below its
+    own top_k-th best row among those passing the id/lang checks: at least top_k better rows exist,
+    so such a row could never stay in the heap. Ties are kept, so the heap's tie order is unchanged.
+    """
+    with matches_path.open("r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), [])
+    if len(set(header)) != len(header):
+        raise pa.ArrowInvalid(f"{matches_path}: duplicate column names")
+    score_key, *cell_fields = fields
+    present = [name for name in dict.fromkeys(fields) if name in header]
+    # The header comes from csv.reader above (skip_rows=1), so column names match the stdlib path
+    # exactly; every column stays a string so ids and extras come back as the raw cells.
+    reader = pa_csv.open_csv(
+        matches_path,
+        read_options=pa_csv.ReadOptions(block_size=8 << 20, skip_rows=1, column_names=header),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=present, column_types={name: pa.string() for name in present}
+        ),
+    )
+    seen = 0
+    for batch in reader:
+        n = batch.num_rows
+        ok = np.ones(n, dtype=bool)
+        if score_key not in present:
+            scores = np.zeros(n)
+        else:
+            raw = batch.column(score_key)
+            try:
+                scores = pc.cast(pc.if_else(pc.equal(raw, ""), "0", raw), pa.float64()).to_numpy(zero_copy_only=False)
+            except pa.ArrowInvalid:
+                # Some cell Arrow cannot cast (padding, "1_000", junk): parse this batch like float().
+                parsed = [_parse_score(v) for v in raw.to_pylist()]
+                ok = np.fromiter((v is not None for v in parsed), dtype=bool, count=n)
+                scores = np.fromiter((0.0 if v is None else v for v in parsed), dtype=np.float64, count=n)
+        # Negated "outside the window" tests, so NaN scores pass exactly as they do in the row loop.
+        keep = ok & ~(scores < min_score)
+        if max_score is not None:
+            keep &= ~(scores > max_score)
+        if top_k > 0 and np.count_nonzero(keep) > top_k:
+            keep &= _pair_rows_mask(batch, cell_fields[0], cell_fields[1], cell_fields[2], drop_lang_unknown)
+            best = scores[keep]
+            # NaN scores compare unpredictably in the heap; leave such batches unpruned.
+            if best.size > top_k and not np.isnan(best).any():
+                keep &= scores >= np.partition(best, best.size - top_k)[best.size - top_k]
+        idx = np.flatnonzero(keep)
+        if idx.size:
+            taken = batch.take(pa.array(idx))
+            cells = [
+                taken.column(name).to_pylist() if name in present else [""] * idx.size for name in cell_fields
+            ]
+            yield from zip((idx + (seen + 1)).tolist(), scores[idx].tolist(), zip(*cells))
+        seen += n
+
+
 def top_pairs_from_csv(
     matches_path: Path,
     *,
@@ -128,42 +420,77 @@ def top_pairs_from_csv(
     max_score: float | None,
     max_candidates: int,
     drop_lang_unknown: bool,
-) -> list[dict]:
+    extra_fields: tuple[str, ...] = (),
+) -> list[tuple]:
+    """
+    Top `max_candidates` rows by score as compact `(score, a, b, *extras)` tuples, best first, where
+    `extras` are the raw `extra_fields` cells ("" when the column or cell is missing).
+    """
+    fields = (score_key, id_a, id_b, lang_key, *extra_fields)
+    try:
+        return _top_pairs(
+            _scored_rows_arrow(
+                matches_path,
+                fields,
+                min_score,
+                max_score,
+                top_k=max_candidates,
+                drop_lang_unknown=drop_lang_unknown,
+            ),
+            max_candidates=max_candidates,
+            drop_lang_unknown=drop_lang_unknown,
+        )
+    except pa.ArrowInvalid:
+        pass
+    return _top_pairs(
+        _scored_rows_stdlib(matches_path, fields, min_score, max_score),
+        max_candidates=max_candidates,
+        drop_lang_unknown=drop_lang_unknown,
+    )
+
+
+def _top_pairs(
+    rows: Iterable[tuple[int, float, tuple[str, ...]]], *, max_candidates: int, drop_lang_unknown: bool
+) -> list[tuple]:
     # Keep only high-scoring candidates in memory (bounded).
     # Note: file is not sorted by score globally; we approximate by selecting top-N by score.
     import heapq
 
-    heap: list[tuple[float, int, dict]] = []
-    seen = 0
-    with matches_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            seen += 1
-            try:
-                score = float(row.get(score_key) or 0.0)
-            except Exception:
-                continue
-            if score < min_score:
-                continue
-            if max_score is not None and score > max_score:
-                continue
-            a = row.get(id_a)
-            b = row.get(id_b)
-            if not isinstance(a, str) or not isinstance(b, str) or not a or not b or a == b:
-                continue
-            lang = str(row.get(lang_key) or "unknown").strip() or "unknown"
-            if drop_lang_unknown and lang == "unknown":
-                continue
-            entry = (score, seen, row)
-            if len(heap) < max_candidates:
-                heapq.heappush(heap, entry)
-            else:
-                if score > heap[0][0]:
-                    heapq.heapreplace(heap, entry)
-    heap.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    heap: list[tuple[float, int, tuple]] = []
+    for seen, score, cells in rows:
+        a, b, lang = cells[0], cells[1], cells[2]
+        if not a or not b or a == b:
+            continue
+        lang = lang.strip() or "unknown"
+        if drop_lang_unknown and lang == "unknown":
+            continue
+        if len(heap) >= max_candidates and score <= heap[0][0]:
+            continue
+        entry = (score, seen, (score, a, b, *cells[3:]))
+        if len(heap) < max_candidates:
+            heapq.heappush(heap, entry)
+        else:
+            if score > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+    # (score, seen) is unique per entry, so the plain tuple order never reaches the payload and
+    # matches the old (score, seen) key without building a key tuple per entry.
+    heap.sort(reverse=True)
     return [r for _, _, r in heap]
 
 
+def cross_first(candidates: list[tuple], is_cross) -> list[tuple]:
+    """
+    Cross-submolt candidates first, then the rest, each group keeping the best-first order from
+    top_pairs_from_csv. A linear partition gives the same order as a stable sort on
+    (is_cross, score) descending, without re-sorting.
+    """
+    cross: list[tuple] = []
+    same: list[tuple] = []
+    for r in candidates:
+        (cross if is_cross(r) else same).append(r)
+    return cross + same
+
+
 def build_post_post_pairs(
     *,
     posts_path: Path,
@@ -177,6 +504,7 @@ def build_post_post_pairs(
     max_excerpt: int,
     drop_lang_unknown: bool,
     drop_submolts: set[str],
+    index_dir: Path | None = None,
 ) -> None:
     candidates = top_pairs_from_csv(
         matches_path,
@@ -188,41 +516,39 @@ def build_post_post_pairs(
         max_score=max_score,
         max_candidates=max_candidates,
         drop_lang_unknown=drop_lang_unknown,
+        extra_fields=("doc_lang",),
     )
     wanted_posts: set[str] = set()
-    for r in candidates:
-        wanted_posts.add(str(r.get("doc_id") or ""))
-        wanted_posts.add(str(r.get("neighbor_id") or ""))
+    for _, a, b, _ in candidates:
+        wanted_posts.add(a)
+        wanted_posts.add(b)
 
-    post_info = load_posts_info(posts_path, wanted_posts, max_excerpt=max_excerpt)
+    post_info = load_posts_info(
+        posts_path, wanted_posts, max_excerpt=max_excerpt, min_alnum=min_alnum, index_dir=index_dir
+    )
 
     out: list[dict] = []
     used_docs: set[str] = set()
     seen_pairs: set[tuple[str, str]] = set()
-    seen_text_pairs: set[tuple[str, str]] = set()
-    def norm(t: str) -> str:
-        return re.sub(r"\s+", " ", (t or "").strip().lower())
+    seen_text_pairs: set[tuple[int, int]] = set()
 
     # Prefer cross-submolt for the public sample: more interpretable “transversalidad”.
-    def is_cross(r: dict) -> bool:
-        a = str(r.get("doc_id") or "")
-        b = str(r.get("neighbor_id") or "")
+    def is_cross(r: tuple) -> bool:
+        _, a, b, _ = r
         ai = post_info.get(a)
         bi = post_info.get(b)
         if not ai or not bi:
             return False
         return ai.submolt != bi.submolt
 
-    ordered = sorted(candidates, key=lambda r: (is_cross(r), float(r.get("score") or 0.0)), reverse=True)
+    ordered = cross_first(candidates, is_cross)
 
-    for r in ordered:
-        a = str(r.get("doc_id") or "")
-        b = str(r.get("neighbor_id") or "")
+    for score, a, b, doc_lang in ordered:
         if not a or not b or a == b:
             continue
         if a in used_docs:
             continue
-        key = tuple(sorted((a, b)))
+        key = (a, b) if a <= b else (b, a)
         if key in seen_pairs:
             continue
         ai = post_info.get(a)
@@ -231,29 +557,23 @@ def build_post_post_pairs(
             continue
         if ai.submolt in drop_submolts or bi.submolt in drop_submolts:
             continue
-        if alnum_count(ai.excerpt) < min_alnum or alnum_count(bi.excerpt) < min_alnum:
+        if not ai.alnum_ok or not bi.alnum_ok:
             continue
-        if looks_like_template(ai.excerpt) or looks_like_template(bi.excerpt):
+        if ai.is_template or bi.is_template:
             continue
-        ta = norm(ai.excerpt)
-        tb = norm(bi.excerpt)
-        if ta == tb:
+        if ai.norm_excerpt == bi.norm_excerpt:
             continue
-        text_key = (ta, tb) if ta <= tb else (tb, ta)
+        ha, hb = ai.text_digest, bi.text_digest
+        text_key = (ha, hb) if ha <= hb else (hb, ha)
         if text_key in seen_text_pairs:
             continue
 
-        try:
-            score = float(r.get("score") or 0.0)
-        except Exception:
-            score = 0.0
-
         out.append(
             {
                 "doc_id": a,
                 "neighbor_id": b,
                 "score": score,
-                "doc_lang": str(r.get("doc_lang") or ai.lang or "unknown"),
+                "doc_lang": str(doc_lang or ai.lang or "unknown"),
                 "doc_submolt": ai.submolt,
                 "neighbor_submolt": bi.submolt,
                 "doc_created_at": ai.created_at,
@@ -297,6 +617,7 @@ def build_post_comment_pairs(
     max_excerpt: int,
     drop_lang_unknown: bool,
     drop_submolts: set[str],
+    index_dir: Path | None = None,
 ) -> None:
     candidates = top_pairs_from_csv(
         matches_path,
@@ -308,43 +629,42 @@ def build_post_comment_pairs(
         max_score=max_score,
         max_candidates=max_candidates,
         drop_lang_unknown=drop_lang_unknown,
+        extra_fields=("lang", "post_submolt", "comment_submolt", "post_created_at", "comment_created_at"),
     )
 
     wanted_posts: set[str] = set()
     wanted_comments: set[str] = set()
     for r in candidates:
-        wanted_posts.add(str(r.get("post_id") or ""))
-        wanted_comments.add(str(r.get("comment_id") or ""))
+        wanted_posts.add(r[1])
+        wanted_comments.add(r[2])
 
-    post_info = load_posts_info(posts_path, wanted_posts, max_excerpt=max_excerpt)
-    comment_info = load_comments_info(comments_path, wanted_comments, max_excerpt=max_excerpt)
+    post_info = load_posts_info(
+        posts_path, wanted_posts, max_excerpt=max_excerpt, min_alnum=min_alnum, index_dir=index_dir
+    )
+    comment_info = load_comments_info(
+        comments_path, wanted_comments, max_excerpt=max_excerpt, min_alnum=min_alnum, index_dir=index_dir
+    )
 
     out: list[dict] = []
+    # Each accepted pair marks its post as used, so used_posts also rules out repeated (post, comment)
+    # pairs; no separate pair set is needed here.
     used_posts: set[str] = set()
-    seen_pairs: set[tuple[str, str]] = set()
-    seen_text_pairs: set[tuple[str, str]] = set()
-    def norm(t: str) -> str:
-        return re.sub(r"\s+", " ", (t or "").strip().lower())
+    seen_text_pairs: set[tuple[int, int]] = set()
 
-    def is_cross(r: dict) -> bool:
-        return str(r.get("post_submolt") or "unknown") != str(r.get("comment_submolt") or "unknown")
+    def is_cross(r: tuple) -> bool:
+        return (r[4] or "unknown") != (r[5] or "unknown")
 
-    ordered = sorted(candidates, key=lambda r: (is_cross(r), float(r.get("score") or 0.0)), reverse=True)
+    ordered = cross_first(candidates, is_cross)
 
-    for r in ordered:
-        post_id = str(r.get("post_id") or "")
-        comment_id = str(r.get("comment_id") or "")
+    for score, post_id, comment_id, raw_lang, raw_post_sub, raw_comment_sub, post_created, comment_created in ordered:
         if not post_id or not comment_id:
             continue
         if post_id in used_posts:
             continue
-        key = (post_id, comment_id)
-        if key in seen_pairs:
-            continue
 
-        lang = str(r.get("lang") or "unknown").strip() or "unknown"
-        post_sub = str(r.get("post_submolt") or "unknown").strip() or "unknown"
-        comment_sub = str(r.get("comment_submolt") or "unknown").strip() or "unknown"
+        lang = (raw_lang or "unknown").strip() or "unknown"
+        post_sub = (raw_post_sub or "unknown").strip() or "unknown"
+        comment_sub = (raw_comment_sub or "unknown").strip() or "unknown"
         if post_sub in drop_submolts or comment_sub in drop_submolts:
             continue
 
@@ -352,24 +672,18 @@ def build_post_comment_pairs(
         ci = comment_info.get(comment_id)
         if not pi or not ci:
             continue
-        if alnum_count(pi.excerpt) < min_alnum or alnum_count(ci.excerpt) < min_alnum:
+        if not pi.alnum_ok or not ci.alnum_ok:
             continue
-        if looks_like_template(pi.excerpt) or looks_like_template(ci.excerpt):
+        if pi.is_template or ci.is_template:
             continue
 
-        tp = norm(pi.excerpt)
-        tc = norm(ci.excerpt)
-        if tp == tc:
+        if pi.norm_excerpt == ci.norm_excerpt:
             continue
-        text_key = (tp, tc) if tp <= tc else (tc, tp)
+        hp, hc = pi.text_digest, ci.text_digest
+        text_key = (hp, hc) if hp <= hc else (hc, hp)
         if text_key in seen_text_pairs:
             continue
 
-        try:
-            score = float(r.get("score") or 0.0)
-        except Exception:
-            score = 0.0
-
         out.append(
             {
                 "post_id": post_id,
@@ -378,14 +692,13 @@ def build_post_comment_pairs(
                 "lang": lang,
                 "post_submolt": post_sub,
                 "comment_submolt": comment_sub,
-                "post_created_at": str(r.get("post_created_at") or pi.created_at or ""),
-                "comment_created_at": str(r.get("comment_created_at") or ci.created_at or ""),
+                "post_created_at": str(post_created or pi.created_at or ""),
+                "comment_created_at": str(comment_created or ci.created_at or ""),
                 "post_excerpt": pi.excerpt,
                 "comment_excerpt": ci.excerpt,
             }
         )
         used_posts.add(post_id)
-        seen_pairs.add(key)
         seen_text_pairs.add(text_key)
         if len(out) >= n_out:
             break
@@ -427,11 +740,22 @@ def main() -> int:
     parser.add_argument("--min-alnum", type=int, default=24, help="Min alphanumeric chars per excerpt to avoid emoji-only noise.")
     parser.add_argument("--max-excerpt", type=int, default=220)
     parser.add_argument("--keep-unknown-lang", action="store_true")
+    parser.add_argument(
+        "--index-dir",
+        default="data/derived/.index",
+        help="Where to cache id->byte-offset indexes of the JSONL dumps (empty string: always scan the dumps).",
+    )
     parser.add_argument(
         "--drop-submolts",
         default="crab-rave",
         help="Comma-separated list of submolts to exclude from post→comment samples (default: crab-rave).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="2 builds the post→post and post→comment tables in parallel processes; 1 builds them in turn.",
+    )
     args = parser.parse_args()
 
     posts_path = Path(args.posts)
@@ -442,36 +766,49 @@ def main() -> int:
     out_pc = Path(args.out_post_comment)
     drop_unknown = not bool(args.keep_unknown_lang)
     drop_submolts = {s.strip() for s in (args.drop_submolts or "").split(",") if s.strip()}
+    index_dir = Path(args.index_dir) if args.index_dir else None
 
-    build_post_post_pairs(
+    common = dict(
         posts_path=posts_path,
-        matches_path=matches_pp,
-        out_path=out_pp,
-        min_score=args.min_score_post_post,
-        max_score=args.max_score_post_post,
         n_out=args.n_out,
         max_candidates=args.max_candidates,
         min_alnum=args.min_alnum,
         max_excerpt=args.max_excerpt,
         drop_lang_unknown=drop_unknown,
         drop_submolts=drop_submolts,
+        index_dir=index_dir,
     )
-
-    build_post_comment_pairs(
-        posts_path=posts_path,
+    post_post = dict(
+        common,
+        matches_path=matches_pp,
+        out_path=out_pp,
+        min_score=args.min_score_post_post,
+        max_score=args.max_score_post_post,
+    )
+    post_comment = dict(
+        common,
         comments_path=comments_path,
         matches_path=matches_pc,
         out_path=out_pc,
         min_score=args.min_score_post_comment,
         max_score=args.max_score_post_comment,
-        n_out=args.n_out,
-        max_candidates=args.max_candidates,
-        min_alnum=args.min_alnum,
-        max_excerpt=args.max_excerpt,
-        drop_lang_unknown=drop_unknown,
-        drop_submolts=drop_submolts,
     )
 
+    if args.workers > 1:
+        # Both builders read the posts index; build it here so the workers only load it.
+        if index_dir is not None and posts_path.exists():
+            build_or_load_index(posts_path, index_dir)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(build_post_post_pairs, **post_post),
+                executor.submit(build_post_comment_pairs, **post_comment),
+            ]
+            for future in futures:
+                future.result()
+    else:
+        build_post_post_pairs(**post_post)
+        build_post_comment_pairs(**post_comment)
+
     print(f"Wrote:\n- {out_pp}\n- {out_pc}")
     return 0
 
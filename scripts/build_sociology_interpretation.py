@@ -5,11 +5,16 @@ import argparse
 import csv
 import json
 import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
 
 def read_csv(path: Path) -> list[dict[str, Any]]:
     if not path.exists():
@@ -18,6 +23,44 @@ def read_csv(path: Path) -> list[dict[str, Any]]:
         return list(csv.DictReader(f))
 
 
+def read_csv_first_row(path: Path) -> dict[str, Any]:
+    """First data row of a CSV (what read_csv(path)[0] gives), without reading the rest; {} if none."""
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return next(csv.DictReader(f), None) or {}
+
+
+def read_csv_columns(path: Path, columns: list[str]) -> dict[str, list[Any]]:
+    """
+    Only `columns` of a CSV, as raw string cells (None where the column is absent), parsed
+    column-wise by Arrow instead of building a dict per row. Files Arrow rejects but DictReader
+    accepts (ragged rows, duplicate header names) go through read_csv instead.
+    """
+    if not path.exists():
+        return {c: [] for c in columns}
+    with path.open("r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), [])
+    if header and len(set(header)) == len(header):
+        try:
+            # Header from csv.reader (skip_rows=1) so names match DictReader's exactly.
+            table = pa_csv.read_csv(
+                path,
+                read_options=pa_csv.ReadOptions(skip_rows=1, column_names=header),
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=columns,
+                    include_missing_columns=True,
+                    column_types={c: pa.string() for c in columns},
+                ),
+            )
+            return table.to_pydict()
+        except pa.ArrowInvalid:
+            pass
+    rows = read_csv(path)
+    return {c: [r.get(c) for r in rows] for c in columns}
+
+
 def read_json(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {}
@@ -45,10 +88,35 @@ def to_int(value: Any, default: int = 0) -> int:
         return default
 
 
+def float_column(values: list[Any]) -> np.ndarray:
+    return np.fromiter((to_float(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def int_total(column: np.ndarray) -> int:
+    # Same as sum(to_int(v) for v in values): each value truncated, NaN/inf counted as 0.
+    return int(np.trunc(column[np.isfinite(column)]).sum())
+
+
+def argmax_first(values: np.ndarray) -> int:
+    """
+    Index that max(range(n), key=values.__getitem__) picks: the first maximum. As with max(), a
+    NaN in first position is never displaced and later NaNs are never chosen.
+    """
+    if np.isnan(values[0]):
+        return 0
+    return int(np.where(np.isnan(values), -np.inf, values).argmax())
+
+
+# Prebuilt formatters for the digit counts the report uses; "%" scales by 100 like value * 100.
+_PCT_FORMATS = {d: f"{{:.{d}%}}".format for d in range(4)}
+_NUM_FORMATS = {d: f"{{:,.{d}f}}".format for d in range(1, 4)}
+
+
 def fmt_pct(value: float | None, digits: int = 1) -> str:
     if value is None or math.isnan(value):
         return "n/d"
-    return f"{value * 100:.{digits}f}%"
+    fmt = _PCT_FORMATS.get(digits)
+    return fmt(value) if fmt is not None else f"{value * 100:.{digits}f}%"
 
 
 def fmt_num(value: float | int | None, digits: int = 0) -> str:
@@ -56,39 +124,38 @@ def fmt_num(value: float | int | None, digits: int = 0) -> str:
         return "n/d"
     if digits <= 0:
         return f"{int(round(float(value))):,}"
-    return f"{float(value):,.{digits}f}"
-
-
-def calc_gini(values: list[float]) -> float | None:
-    clean = sorted(v for v in values if v >= 0 and math.isfinite(v))
-    n = len(clean)
+    fmt = _NUM_FORMATS.get(digits)
+    return fmt(float(value)) if fmt is not None else f"{float(value):,.{digits}f}"
+
+
+def concentration(values: list[float] | np.ndarray, *top_ns: int) -> tuple[float | None, ...]:
+    """
+    `(gini, *top_shares)` from a single filter + sort of `values` (finite, non-negative entries
+    only), where each top share is the fraction of the total held by the `n` largest values.
+    Every entry is None when nothing is left after filtering, and 0.0 when the total is 0.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    clean = np.sort(arr[(arr >= 0) & np.isfinite(arr)])
+    n = clean.size
     if n == 0:
-        return None
-    total = sum(clean)
-    if total <= 0:
-        return 0.0
-    weighted = sum((idx + 1) * v for idx, v in enumerate(clean))
-    return (2 * weighted) / (n * total) - (n + 1) / n
-
-
-def share_top(values: list[float], top_n: int) -> float | None:
-    clean = sorted((v for v in values if v >= 0 and math.isfinite(v)), reverse=True)
-    if not clean:
-        return None
-    total = sum(clean)
+        return (None,) * (1 + len(top_ns))
+    total = float(clean.sum())
     if total <= 0:
-        return 0.0
-    n = min(len(clean), max(0, top_n))
-    if n <= 0:
-        return 0.0
-    return sum(clean[:n]) / total
+        return (0.0,) * (1 + len(top_ns))
+    weighted = float(np.arange(1, n + 1, dtype=np.float64) @ clean)
+    gini = (2 * weighted) / (n * total) - (n + 1) / n
+    # Ascending order: the top k values are the last k; a reversed cumsum gives every top-k sum.
+    top_sums = np.cumsum(clean[::-1])
+    shares = [float(top_sums[min(n, k) - 1]) / total if k > 0 else 0.0 for k in top_ns]
+    return (gini, *shares)
 
 
 def parse_iso(raw: str | None) -> datetime | None:
     if not raw:
         return None
     try:
-        return datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+        # Python 3.11+ (the project floor) reads a trailing "Z" as UTC itself.
+        return datetime.fromisoformat(str(raw))
     except Exception:
         return None
 
@@ -105,8 +172,9 @@ def top_language(rows: list[dict[str, Any]], scope: str) -> tuple[str, float]:
     filtered = [r for r in rows if str(r.get("scope") or "") == scope]
     if not filtered:
         return ("n/d", 0.0)
-    best = max(filtered, key=lambda r: to_float(r.get("share")))
-    return (str(best.get("lang") or "n/d"), to_float(best.get("share")))
+    shares = float_column([r.get("share") for r in filtered])
+    best = argmax_first(shares)
+    return (str(filtered[best].get("lang") or "n/d"), float(shares[best]))
 
 
 def safe_read_rate(summary_rows: list[dict[str, Any]], feature: str) -> float:
@@ -117,30 +185,18 @@ def safe_read_rate(summary_rows: list[dict[str, Any]], feature: str) -> float:
 
 
 def distance_ratio(embedding_rows: list[dict[str, Any]]) -> tuple[float | None, int]:
-    rows = sorted(embedding_rows, key=lambda r: to_float(r.get("doc_count")), reverse=True)[:250]
-    if len(rows) < 12:
-        return (None, len(rows))
-    xs = [to_float(r.get("x")) for r in rows]
-    ys = [to_float(r.get("y")) for r in rows]
-    mean_x = sum(xs) / len(xs)
-    mean_y = sum(ys) / len(ys)
-    dists = sorted(math.sqrt((x - mean_x) ** 2 + (y - mean_y) ** 2) for x, y in zip(xs, ys))
-
-    def q(sorted_values: list[float], quantile: float) -> float:
-        if not sorted_values:
-            return 0.0
-        pos = (len(sorted_values) - 1) * quantile
-        base = int(pos)
-        frac = pos - base
-        if base + 1 < len(sorted_values):
-            return sorted_values[base] + frac * (sorted_values[base + 1] - sorted_values[base])
-        return sorted_values[base]
-
-    p50 = q(dists, 0.5)
-    p90 = q(dists, 0.9)
+    counts = float_column([r.get("doc_count") for r in embedding_rows])
+    # Stable sort on the negated counts keeps file order among equal counts, as sorted(reverse=True) did.
+    top = np.argsort(-counts, kind="stable")[:250]
+    if top.size < 12:
+        return (None, int(top.size))
+    xs = float_column([embedding_rows[i].get("x") for i in top])
+    ys = float_column([embedding_rows[i].get("y") for i in top])
+    dists = np.hypot(xs - xs.mean(), ys - ys.mean())
+    p50, p90 = np.quantile(dists, [0.5, 0.9])
     if p50 <= 0:
-        return (None, len(rows))
-    return (p90 / p50, len(rows))
+        return (None, int(top.size))
+    return (float(p90 / p50), int(top.size))
 
 
 @dataclass
@@ -207,40 +263,63 @@ class SociologyData:
 
 
 def build_metrics(derived: Path) -> SociologyData:
-    coverage = read_json(derived / "coverage_quality.json")
-    submolts = read_csv(derived / "submolt_stats.csv")
-    authors = read_csv(derived / "author_stats.csv")
-    runs = read_csv(derived / "diffusion_runs.csv")
-    language = read_csv(derived / "public_language_distribution.csv")
-    meme_tech = read_csv(derived / "meme_candidates_technical.csv")
-    meme_culture = read_csv(derived / "meme_candidates_cultural.csv")
-    meme_class = read_csv(derived / "meme_classification.csv")
-    ontology_summary = read_csv(derived / "ontology_summary.csv")
-    ontology_pairs = read_csv(derived / "ontology_cooccurrence_top.csv")
-    ontology_map = read_csv(derived / "ontology_submolt_embedding_2d.csv")
-    emb_post_post = read_json(derived / "public_embeddings_summary.json")
-    emb_post_comment = read_json(derived / "embeddings_post_comment" / "public_embeddings_post_comment_summary.json")
-    threshold = read_json(derived / "transmission_threshold_sensitivity.json")
-    vsm = read_json(derived / "transmission_vsm_baseline.json")
-    transmission_samples = read_csv(derived / "public_transmission_samples.csv")
-    reply_summary = read_json(derived / "reply_graph_summary.json")
-    reply_centrality = read_csv(derived / "reply_graph_centrality.csv")
-
-    posts_total = to_int(coverage.get("posts_total")) or sum(to_int(r.get("posts")) for r in submolts)
-    comments_total = to_int(coverage.get("comments_total")) or sum(to_int(r.get("comments")) for r in submolts)
-    submolts_total = len(submolts)
-    authors_total = len(authors)
-    runs_total = len({str(r.get("run_id") or "") for r in runs if r.get("run_id")})
-
-    volumes = [to_float(r.get("posts")) + to_float(r.get("comments")) for r in submolts]
-    top5_share = share_top(volumes, 5) or 0.0
+    # The inputs are independent reads; a small thread pool overlaps their file I/O.
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        coverage_job = pool.submit(read_json, derived / "coverage_quality.json")
+        submolts_job = pool.submit(read_csv_columns, derived / "submolt_stats.csv", ["posts", "comments"])
+        authors_job = pool.submit(read_csv_columns, derived / "author_stats.csv", ["posts", "comments"])
+        runs_job = pool.submit(read_csv_columns, derived / "diffusion_runs.csv", ["run_id"])
+        language_job = pool.submit(read_csv, derived / "public_language_distribution.csv")
+        meme_tech_job = pool.submit(read_csv, derived / "meme_candidates_technical.csv")
+        meme_culture_job = pool.submit(read_csv, derived / "meme_candidates_cultural.csv")
+        meme_class_job = pool.submit(read_csv, derived / "meme_classification.csv")
+        ontology_summary_job = pool.submit(read_csv, derived / "ontology_summary.csv")
+        top_pair_job = pool.submit(read_csv_first_row, derived / "ontology_cooccurrence_top.csv")
+        ontology_map_job = pool.submit(read_csv, derived / "ontology_submolt_embedding_2d.csv")
+        emb_post_post_job = pool.submit(read_json, derived / "public_embeddings_summary.json")
+        emb_post_comment_job = pool.submit(
+            read_json, derived / "embeddings_post_comment" / "public_embeddings_post_comment_summary.json"
+        )
+        threshold_job = pool.submit(read_json, derived / "transmission_threshold_sensitivity.json")
+        vsm_job = pool.submit(read_json, derived / "transmission_vsm_baseline.json")
+        transmission_samples_job = pool.submit(read_csv, derived / "public_transmission_samples.csv")
+        reply_summary_job = pool.submit(read_json, derived / "reply_graph_summary.json")
+        reply_centrality_job = pool.submit(read_csv_columns, derived / "reply_graph_centrality.csv", ["in_degree"])
+    coverage = coverage_job.result()
+    submolts = submolts_job.result()
+    authors = authors_job.result()
+    runs = runs_job.result()
+    language = language_job.result()
+    meme_tech = meme_tech_job.result()
+    meme_culture = meme_culture_job.result()
+    meme_class = meme_class_job.result()
+    ontology_summary = ontology_summary_job.result()
+    top_pair = top_pair_job.result()
+    ontology_map = ontology_map_job.result()
+    emb_post_post = emb_post_post_job.result()
+    emb_post_comment = emb_post_comment_job.result()
+    threshold = threshold_job.result()
+    vsm = vsm_job.result()
+    transmission_samples = transmission_samples_job.result()
+    reply_summary = reply_summary_job.result()
+    reply_centrality = reply_centrality_job.result()
+
+    # Each column is parsed once; totals, volumes and activity are array ops on the same values.
+    submolt_posts = float_column(submolts["posts"])
+    submolt_comments = float_column(submolts["comments"])
+    posts_total = to_int(coverage.get("posts_total")) or int_total(submolt_posts)
+    comments_total = to_int(coverage.get("comments_total")) or int_total(submolt_comments)
+    submolts_total = len(submolt_posts)
+    authors_total = len(authors["posts"])
+    # Raw cells are already strings; filter(None) drops blank and absent ids like the old `if` did.
+    runs_total = len(set(filter(None, runs["run_id"])))
+
+    volumes = submolt_posts + submolt_comments
     top2_n = max(1, int(math.ceil(submolts_total * 0.02))) if submolts_total else 1
-    top2_share = share_top(volumes, top2_n) or 0.0
-    gini_submolt = calc_gini(volumes) or 0.0
+    gini_submolt, top5_share, top2_share = (x or 0.0 for x in concentration(volumes, 5, top2_n))
 
-    author_activity = [to_float(r.get("posts")) + to_float(r.get("comments")) for r in authors]
-    top10_authors_share = share_top(author_activity, 10) or 0.0
-    gini_authors = calc_gini(author_activity) or 0.0
+    author_activity = float_column(authors["posts"]) + float_column(authors["comments"])
+    gini_authors, top10_authors_share = (x or 0.0 for x in concentration(author_activity, 10))
 
     top_post_lang, top_post_lang_share = top_language(language, "posts")
     top_comment_lang, top_comment_lang_share = top_language(language, "comments")
@@ -251,11 +330,13 @@ def build_metrics(derived: Path) -> SociologyData:
     infra_share = (tech_total / meme_total) if meme_total > 0 else 0.0
     narrative_share = (culture_total / meme_total) if meme_total > 0 else 0.0
 
-    top_life_row = max(meme_class, key=lambda r: to_float(r.get("lifetime_hours")), default={})
-    top_burst_row = max(meme_class, key=lambda r: to_float(r.get("burst_score")), default={})
-    top_disp_row = max(meme_class, key=lambda r: to_float(r.get("submolts_touched")), default={})
+    top_life_row = top_burst_row = top_disp_row = {}
+    if meme_class:
+        top_life_row, top_burst_row, top_disp_row = (
+            meme_class[argmax_first(float_column([r.get(key) for r in meme_class]))]
+            for key in ("lifetime_hours", "burst_score", "submolts_touched")
+        )
 
-    top_pair = ontology_pairs[0] if ontology_pairs else {}
     pca_ratio, pca_rows = distance_ratio(ontology_map)
 
     thresholds = sorted(threshold.get("thresholds", []), key=lambda t: to_float(t.get("threshold")))
@@ -266,20 +347,21 @@ def build_metrics(derived: Path) -> SociologyData:
     threshold_knee = None
     threshold_knee_drop = None
     if len(thresholds) >= 2:
-        best_drop = -1.0
-        for idx in range(1, len(thresholds)):
-            prev_count = max(1, to_float(thresholds[idx - 1].get("pair_count")))
-            curr_count = to_float(thresholds[idx].get("pair_count"))
-            drop = (prev_count - curr_count) / prev_count
-            if drop > best_drop:
-                best_drop = drop
-                threshold_knee = to_float(thresholds[idx].get("threshold"))
-                threshold_knee_drop = drop
+        counts = np.array([to_float(t.get("pair_count")) for t in thresholds])
+        prev_counts = np.fmax(counts[:-1], 1.0)
+        drops = (prev_counts - counts[1:]) / prev_counts
+        # First largest drop that beats -1.0; NaN drops never qualify.
+        drops = np.where(drops > -1.0, drops, -np.inf)
+        knee = int(drops.argmax())
+        if drops[knee] > -1.0:
+            threshold_knee = to_float(thresholds[knee + 1].get("threshold"))
+            threshold_knee_drop = float(drops[knee])
 
     vsm_all = (vsm.get("metrics") or {}).get("_all") or {}
 
-    in_degrees = [to_float(r.get("in_degree")) for r in reply_centrality]
-    reply_top2_n = max(1, int(math.ceil(len(in_degrees) * 0.02))) if in_degrees else 1
+    in_degrees = float_column(reply_centrality["in_degree"])
+    reply_top2_n = max(1, int(math.ceil(in_degrees.size * 0.02))) if in_degrees.size else 1
+    reply_gini, reply_top2_share = (x or 0.0 for x in concentration(in_degrees, reply_top2_n))
 
     claim_matrix_path = derived.parents[1] / "reports" / "audit" / "claim_matrix.csv"
 
@@ -340,8 +422,8 @@ def build_metrics(derived: Path) -> SociologyData:
         reply_nodes=to_int(reply_summary.get("nodes")),
         reply_edges=to_int(reply_summary.get("edges")),
         reply_reciprocity=to_float(reply_summary.get("reciprocity")),
-        reply_top2_share=share_top(in_degrees, reply_top2_n) or 0.0,
-        reply_gini=calc_gini(in_degrees) or 0.0,
+        reply_top2_share=reply_top2_share,
+        reply_gini=reply_gini,
         claim_matrix_exists=claim_matrix_path.exists(),
     )
 
@@ -49,8 +49,8 @@ NARRATIVE_PATTERNS = [
 ]
 
 
-def human_incidence_score(text: str) -> Dict[str, float]:
-    t = normalize_text(text)
+def human_incidence_score(text: str, normalized: str | None = None) -> Dict[str, float]:
+    t = normalized if normalized is not None else normalize_text(text)
     human = _count_patterns(t, HUMAN_PATTERNS)
     prompt = _count_patterns(t, PROMPT_PATTERNS)
     tooling = _count_patterns(t, TOOLING_PATTERNS)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 
 from moltbook_analysis.analyze.text import clean_text
 
+try:
+    import ahocorasick
+except Exception:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
 
 INJECTION_PATTERNS = [
     r"ignore (all|previous|earlier) (instructions|prompts)",
@@ -35,8 +40,61 @@ REPEAT_RE = re.compile(r"(.)\1{20,}")
 ALNUM_RUN_RE = re.compile(r"[A-Za-z0-9+/=]{240,}")
 
 
-def _count_patterns(text: str, patterns: List[str]) -> int:
-    return sum(1 for p in patterns if re.search(p, text, flags=re.IGNORECASE))
+_INJECTION_RES = [re.compile(p, re.IGNORECASE) for p in INJECTION_PATTERNS]
+_DISCLAIMER_RES = [re.compile(p, re.IGNORECASE) for p in LLM_DISCLAIMERS]
+
+
+def _count_patterns(text: str, patterns: List[re.Pattern]) -> int:
+    return sum(1 for p in patterns if p.search(text))
+
+
+def _expand_literals(pattern: str) -> List[str]:
+    """Expand a pattern built from plain text and flat `(a|b)` groups into every literal it matches."""
+    out = [""]
+    for i, part in enumerate(re.split(r"\(([^()]*)\)", pattern)):
+        options = part.split("|") if i % 2 else [part]
+        out = [prefix + opt for prefix in out for opt in options]
+    return out
+
+
+def _build_automaton():
+    """
+    Compile INJECTION_PATTERNS/LLM_DISCLAIMERS into one Aho-Corasick automaton (a single pass over the
+    text yields every hit). Patterns that do not expand to plain lowercase literals stay as regex.
+    """
+    if ahocorasick is None:
+        return None, []
+    automaton = ahocorasick.Automaton()
+    residual: List[Tuple[str, re.Pattern]] = []
+    for kind, patterns in (("inj", INJECTION_PATTERNS), ("dis", LLM_DISCLAIMERS)):
+        for idx, pattern in enumerate(patterns):
+            literals = _expand_literals(pattern)
+            if all(lit == lit.lower() and re.fullmatch(pattern, lit) for lit in literals):
+                for lit in literals:
+                    automaton.add_word(lit, (kind, idx))
+            else:
+                residual.append((kind, re.compile(pattern, re.IGNORECASE)))
+    automaton.make_automaton()
+    return automaton, residual
+
+
+_AUTOMATON, _RESIDUAL_PATTERNS = _build_automaton()
+
+
+def _pattern_hits(text: str) -> Tuple[int, int]:
+    """Return (injection_hits, disclaimer_hits): number of distinct patterns found in `text`."""
+    if _AUTOMATON is None:
+        return _count_patterns(text, _INJECTION_RES), _count_patterns(text, _DISCLAIMER_RES)
+    matched = {value for _, value in _AUTOMATON.iter(text.lower())}
+    inj = sum(1 for kind, _ in matched if kind == "inj")
+    dis = len(matched) - inj
+    for kind, pattern in _RESIDUAL_PATTERNS:
+        if pattern.search(text):
+            if kind == "inj":
+                inj += 1
+            else:
+                dis += 1
+    return inj, dis
 
 def noise_score(text: str) -> float:
     """
@@ -64,8 +122,9 @@ def noise_score(text: str) -> float:
     return float(score)
 
 
-def interference_score(text: str) -> Dict[str, float]:
-    t = clean_text(text)
+def interference_score(text: str, cleaned: str | None = None) -> Dict[str, float]:
+    # `cleaned` (clean_text(text)) may be passed in by callers that already computed it.
+    t = cleaned if cleaned is not None else clean_text(text)
     if not t:
         return {
             "score": 0.0,
@@ -76,8 +135,7 @@ def interference_score(text: str) -> Dict[str, float]:
             "disclaimer_hits": 0,
         }
 
-    inj = _count_patterns(t, INJECTION_PATTERNS)
-    dis = _count_patterns(t, LLM_DISCLAIMERS)
+    inj, dis = _pattern_hits(t)
 
     code_blocks = len(CODE_FENCE_RE.findall(text))
     urls = len(URL_RE.findall(text))
@@ -106,8 +106,8 @@ EPISTEMIC_PATTERNS: Dict[str, Iterable[str]] = {
 }
 
 
-def speech_act_features(text: str) -> Dict[str, int]:
-    t = normalize_text(text)
+def speech_act_features(text: str, normalized: str | None = None) -> Dict[str, int]:
+    t = normalized if normalized is not None else normalize_text(text)
     out: Dict[str, int] = {}
     for key, patterns in SPEECH_ACT_PATTERNS.items():
         if key == "assertion":
@@ -136,18 +136,18 @@ def speech_act_features(text: str) -> Dict[str, int]:
     return out
 
 
-def declaration_features(text: str) -> Dict[str, int]:
-    t = normalize_text(text)
+def declaration_features(text: str, normalized: str | None = None) -> Dict[str, int]:
+    t = normalized if normalized is not None else normalize_text(text)
     return {key: _count_patterns(t, patterns) for key, patterns in DECLARATION_PATTERNS.items()}
 
 
-def mood_features(text: str) -> Dict[str, int]:
-    t = normalize_text(text)
+def mood_features(text: str, normalized: str | None = None) -> Dict[str, int]:
+    t = normalized if normalized is not None else normalize_text(text)
     return {f"mood_{key}": _count_patterns(t, patterns) for key, patterns in MOOD_PATTERNS.items()}
 
 
-def epistemic_features(text: str) -> Dict[str, int]:
-    t = normalize_text(text)
+def epistemic_features(text: str, normalized: str | None = None) -> Dict[str, int]:
+    t = normalized if normalized is not None else normalize_text(text)
     return {f"epistemic_{key}": _count_patterns(t, patterns) for key, patterns in EPISTEMIC_PATTERNS.items()}
 
 
@@ -184,10 +184,12 @@ def script_profile(text: str) -> Dict[str, float]:
     return ratios
 
 
-def language_signals(text: str) -> Dict[str, int | float]:
+def language_signals(text: str, normalized: str | None = None) -> Dict[str, int | float]:
+    # `normalized` (normalize_text(text)) may be passed in by callers that already computed it.
+    t = normalized if normalized is not None else normalize_text(text)
     features: Dict[str, int | float] = {}
-    features.update(speech_act_features(text))
-    features.update(declaration_features(text))
-    features.update(mood_features(text))
-    features.update(epistemic_features(text))
+    features.update(speech_act_features(text, t))
+    features.update(declaration_features(text, t))
+    features.update(mood_features(text, t))
+    features.update(epistemic_features(text, t))
     return features
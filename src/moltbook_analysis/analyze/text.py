@@ -13,7 +13,12 @@ TOKEN_RE = re.compile(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ0-9_#@']{2,}")
 
 
 def clean_text(text: str) -> str:
-    text = CODE_BLOCK_RE.sub(" ", text)
+    if "```" in text:
+        text = CODE_BLOCK_RE.sub(" ", text)
+    # Fast path: no URL and no whitespace besides single ASCII spaces (isprintable() is False for
+    # tabs, newlines and Unicode spaces), so the remaining passes would not change anything.
+    if "http" not in text and "www." not in text and "  " not in text and text.isprintable():
+        return text.strip()
     text = URL_RE.sub(" ", text)
     text = WHITESPACE_RE.sub(" ", text).strip()
     return text